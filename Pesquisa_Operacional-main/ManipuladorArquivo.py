@@ -1,47 +1,104 @@
-import re
+import itertools
+import os
+
+import numpy as np
 
 
 class ManipuladorArquivo:
-    def __init__(self, nome_arquivo_entrada):
+    def __init__(self, nome_arquivo_entrada, usar_cache=True):
         self.nome_arquivo_entrada = nome_arquivo_entrada
-        self.conteudo = None
+        self.usar_cache = usar_cache  # guarda a tabela em um .npy ao lado do .txt
+        self.cabecalho = {}
+        self.clientes = []
+        self.facilidades = []
+        self.distancias = None
         self.ler_arquivo()
 
+    def caminho_cache(self):
+        return f"{self.nome_arquivo_entrada}.npy"
+
+    def cache_valido(self):
+        caminho_txt = f"{self.nome_arquivo_entrada}.txt"
+        caminho_npy = self.caminho_cache()
+        return (
+            self.usar_cache
+            and os.path.exists(caminho_npy)
+            and os.path.getmtime(caminho_npy) >= os.path.getmtime(caminho_txt)
+        )
+
     def ler_arquivo(self):
+        # leitura em uma unica passada, linha a linha, sem avaliar o conteudo do arquivo:
+        # cabecalho (chave=valor), conjuntos de clientes e facilidades e por fim a tabela,
+        # lida direto para um array NumPy (ou carregada do cache, sem ler o resto do arquivo)
         with open(f"{self.nome_arquivo_entrada}.txt", "r") as arquivo_entrada:
-            self.conteudo = arquivo_entrada.read()
+            conjunto = None
+            for linha in arquivo_entrada:
+                if conjunto is None:
+                    chave, _, valor = linha.partition("=")
+                    chave = chave.strip()
+                    if not chave:
+                        continue
+                    if chave == "table":
+                        self.distancias = self.ler_tabela(arquivo_entrada, valor)
+                        break
+                    if chave not in ("clients", "facilities"):
+                        self.cabecalho[chave] = valor.strip()
+                        continue
+                    conjunto = self.clientes if chave == "clients" else self.facilidades
+                    linha = valor
+                fim = "}" in linha
+                elementos = linha.replace("{", "").replace("}", "").split(",")
+                conjunto.extend(elemento.strip() for elemento in elementos if elemento.strip())
+                if fim:
+                    conjunto = None
+        if self.distancias is None:
+            raise ValueError(f"Tabela de distancias nao encontrada em {self.nome_arquivo_entrada}.txt")
+
+    def ler_tabela(self, arquivo_entrada, inicio):
+        # a tabela tem m linhas (facilidades) com n valores (clientes)
+        m, n = self.obter_m_facilities(), self.obter_n_clients()
+        if self.cache_valido():
+            distancias = np.load(self.caminho_cache())
+            if distancias.shape == (m, n):
+                return distancias
+        valores = np.empty(m * n, dtype=np.float64)
+        preenchidos = 0
+        for linha in itertools.chain([inicio], arquivo_entrada):
+            numeros = linha.replace("{", "").replace("}", "").strip().strip(",")
+            if not numeros:
+                continue
+            bloco = np.array(numeros.split(","), dtype=np.float64)
+            if preenchidos + len(bloco) > m * n:
+                raise ValueError(f"Tabela com mais de {m}x{n} valores")
+            valores[preenchidos : preenchidos + len(bloco)] = bloco
+            preenchidos += len(bloco)
+        if preenchidos != m * n:
+            raise ValueError(f"Tabela com {preenchidos} valores, esperado {m}x{n}")
+        distancias = valores.reshape(m, n)
+        if self.usar_cache:
+            try:
+                np.save(self.caminho_cache(), distancias)
+            except OSError:
+                pass
+        return distancias
 
     def obter_tipo(self):
-        type_match = re.search(r"type=(\w+)", self.conteudo)
-        return type_match.group(1)
+        return self.cabecalho["type"]
 
     def obter_n_clients(self):
-        n_match = re.search(r"n=(\d+)", self.conteudo)
-        return int(n_match.group(1))
+        return int(self.cabecalho["n"])
 
     def obter_m_facilities(self):
-        m_match = re.search(r"m=(\d+)", self.conteudo)
-        return int(m_match.group(1))
+        return int(self.cabecalho["m"])
 
     def obter_p_desired_facilities(self):
-        p_match = re.search(r"p=(\d+)", self.conteudo)
-        return int(p_match.group(1))
+        return int(self.cabecalho["p"])
 
     def obter_clientes(self):
-        clients_match = re.search(r"clients = \{(.*?)\}", self.conteudo, re.DOTALL)
-        clients_value = [s.strip() for s in clients_match.group(1).split(",")]
-        return clients_value
+        return self.clientes
 
     def obter_facilidades(self):
-        facilities_match = re.search(
-            r"facilities = \{(.*?)\}", self.conteudo, re.DOTALL
-        )
-        facilities_value = [s.strip() for s in facilities_match.group(1).split(",")]
-        return facilities_value
+        return self.facilidades
 
     def obter_distancias_facilidades(self):
-        conteudo_sem_quebras = self.conteudo.replace("\n", "")
-        variaveis = re.split(r"table =", conteudo_sem_quebras)[-1]
-        variaveis = variaveis.replace("{", "[").replace("}", "]")
-        variaveis = eval(variaveis)
-        return variaveis
+        return self.distancias
@@ -1,6 +1,9 @@
 import copy
 import random
 import math
+import time
+
+import numpy as np
 from ManipuladorArquivo import ManipuladorArquivo
 from ordered_crossover import ordered_crossover
 
@@ -30,13 +33,14 @@ class GeneticAlgorithm:
         self.m = m  # numero de facilidades
         self.J = J  # conjunto das facilidades candidatas
         self.p = p  # numero de facilidades a serem abertas
-        self.distancias = (
-            distancias  # matriz de distancias entre a facilidade j e o cliente i
-        )
+        self.distancias = np.ascontiguousarray(
+            distancias, dtype=np.float64
+        )  # matriz de distancias entre a facilidade j e o cliente i
         self.facilidades = []
         self.melhor_solucao = None
         self.custo_atual = 0
         self.custo_solucao = 0
+        self.historico = []  # (instante, custo) de cada melhoria do melhor individuo
         self.n_populacao_inicial = n_populacao_inicial
         self.taxa_elitismo = taxa_elitismo
         self.tamanho_populacao = tamanho_populacao
@@ -57,24 +61,15 @@ class GeneticAlgorithm:
         # definir o atendimento de cada cliente
         # cada cliente deve ser atendido pela facilidade mais proxima
         # cada cliente e atendido por apenas uma facilidade
-        xij = [None] * self.n
-        facilidades_abertas = facilidades
-        for i in range(self.n):
-            menor_distancia = float("inf")
-            for j in facilidades_abertas:
-                if self.distancias[j][i] < menor_distancia:
-                    menor_distancia = self.distancias[j][i]
-                    xij[i] = j
-        return xij
+        facilidades_abertas = np.asarray(facilidades)
+        return facilidades_abertas[self.distancias[facilidades_abertas].argmin(axis=0)]
 
     def fitness(self, s):
         # para cada cliente, somar a distancia entre ele e a facilidade que o atende
         # a funcao objetivo e maximizar a soma das distancias da distancia minima entre cada facilidade e cada cliente
-        xij = self.define_atendimento(s)
-        custo = 0
-        for i, j in enumerate(xij):
-            custo += self.distancias[j][i]
-        return custo
+        # o minimo por coluna das linhas das facilidades abertas e a distancia de cada cliente a sua facilidade
+        facilidades_abertas = np.asarray(s)
+        return float(self.distancias[facilidades_abertas].min(axis=0).sum())
 
     def classificar_individuos(self):
         self.populacao.sort(key=self.fitness, reverse=True)
@@ -132,8 +127,14 @@ class GeneticAlgorithm:
 
     def executar(self):
         self.classificar_individuos()
+        self.custo_solucao = self.fitness(self.populacao[0])
+        self.historico = [(time.perf_counter(), self.custo_solucao)]
         for _ in range(self.n_geracoes):
             self.selecionar_individuos()
             self.cruzar_populacao()
             self.classificar_individuos()
+            custo = self.fitness(self.populacao[0])
+            if custo > self.custo_solucao:
+                self.custo_solucao = custo
+                self.historico.append((time.perf_counter(), custo))
         return self.fitness(self.populacao[0])
@@ -1,6 +1,10 @@
 import random
 import math
+import time
 
+import numpy as np
+
+from troca_rapida import TrocaRapida
 
 class SimulatedAnnealing:
     def __init__(
@@ -20,13 +24,15 @@ class SimulatedAnnealing:
         self.m = m  # numero de facilidades
         self.J = J  # conjunto das facilidades candidatas
         self.p = p  # numero de facilidades a serem abertas
-        self.distancias = (
-            distancias  # matriz de distancias entre a facilidade j e o cliente i
-        )
+        self.distancias = np.ascontiguousarray(
+            distancias, dtype=np.float64
+        )  # matriz de distancias entre a facilidade j e o cliente i
         self.facilidades = []
+        self.troca_rapida = None
         self.melhor_solucao = None
         self.custo_atual = 0
         self.custo_solucao = 0
+        self.historico = []  # (instante, custo) de cada melhoria da melhor solucao
         self.temperatura_inicial = temperatura_inicial
         self.temperatura = self.temperatura_inicial
         self.alpha = alpha
@@ -50,30 +56,32 @@ class SimulatedAnnealing:
         # definir o atendimento de cada cliente
         # cada cliente deve ser atendido pela facilidade mais proxima
         # cada cliente e atendido por apenas uma facilidade
-        xij = [None] * self.n
-        facilidades_abertas = facilidades[: self.p]
-        for i in range(self.n):
-            menor_distancia = float("inf")
-            for j in facilidades_abertas:
-                if self.distancias[j][i] < menor_distancia:
-                    menor_distancia = self.distancias[j][i]
-                    xij[i] = j
-        return xij
+        facilidades_abertas = np.asarray(facilidades[: self.p])
+        return facilidades_abertas[self.distancias[facilidades_abertas].argmin(axis=0)]
 
     def funcao_objetivo(self, s):
         # para cada cliente, somar a distancia entre ele e a facilidade que o atende
         # a funcao objetivo e maximizar a soma das distancias da distancia minima entre cada facilidade e cada cliente
-        xij = self.define_atendimento(s)
-        custo = 0
-        for i, j in enumerate(xij):
-            custo += self.distancias[j][i]
-        return custo
+        # o minimo por coluna das linhas das facilidades abertas e a distancia de cada cliente a sua facilidade
+        facilidades_abertas = np.asarray(s[: self.p])
+        return float(self.distancias[facilidades_abertas].min(axis=0).sum())
 
     def vizinhanca(self):
         # gerar uma vizinhanca da solucao atual
         # trocar uma facilidade aberta por uma fechada
         # ou vice versa
-        vizinho = self.facilidades.copy()
+        return self.troca_posicoes(self.facilidades.copy(), self.sortear_trocas())
+
+    def troca_posicoes(self, facilidades, trocas):
+        for facilidade_sai, facilidade_entra in trocas:
+            facilidades[facilidade_sai], facilidades[facilidade_entra] = (
+                facilidades[facilidade_entra],
+                facilidades[facilidade_sai],
+            )
+        return facilidades
+
+    def sortear_trocas(self):
+        # sortear as posicoes (aberta, fechada) a serem trocadas na solucao atual
         # definir pesos para cada tipo de troca
         if self.temperatura > 0.5 * self.temperatura_inicial:
             pesos = [0.6, 0.30, 0.10]
@@ -85,15 +93,51 @@ class SimulatedAnnealing:
         trocas = random.choices([1, 2, 3], weights=pesos, k=1)[0]
         # obter amostra exclusiva de facilidades a serem trocadas
         facilidades_trocadas = random.sample(range(self.p), trocas)
+        return [
+            (facilidade_sai, random.randint(self.p, self.m - 1))
+            for facilidade_sai in facilidades_trocadas
+        ]
+
+    def aplica_trocas(self, trocas):
+        # aplica as trocas de posicoes na solucao atual e na estrutura de troca rapida
+        for facilidade_sai, facilidade_entra in trocas:
+            self.troca_rapida.aplica_troca(
+                self.facilidades[facilidade_entra], self.facilidades[facilidade_sai]
+            )
+            self.troca_posicoes(self.facilidades, [(facilidade_sai, facilidade_entra)])
 
-        for facilidade_sai in facilidades_trocadas:
-            facilidade_entra = random.randint(self.p, self.m - 1)
-            vizinho[facilidade_sai], vizinho[facilidade_entra] = (
-                vizinho[facilidade_entra],
-                vizinho[facilidade_sai],
+    def custo_trocas(self, trocas):
+        # uma unica troca e avaliada em O(n) pela troca rapida, sem alterar a solucao
+        # com mais trocas, o vizinho e avaliado por completo
+        if len(trocas) == 1:
+            facilidade_sai, facilidade_entra = trocas[0]
+            return self.custo_atual + self.troca_rapida.delta_troca(
+                self.facilidades[facilidade_entra], self.facilidades[facilidade_sai]
             )
+        return self.funcao_objetivo(self.troca_posicoes(self.facilidades.copy(), trocas))
 
-        return vizinho
+    def inicia_troca_rapida(self, facilidades):
+        self.facilidades = list(facilidades)
+        self.troca_rapida = TrocaRapida(self.distancias, self.facilidades[: self.p])
+        self.custo_atual = self.troca_rapida.custo()
+
+    def busca_local(self):
+        # busca local com a troca rapida: para cada facilidade fechada, avalia de uma vez
+        # a troca com todas as abertas e aplica a melhor troca da vizinhanca enquanto melhorar
+        # (a funcao objetivo deste pacote e maximizada)
+        while True:
+            abertas = np.asarray(self.facilidades[: self.p])
+            melhor_delta, melhor_troca = 0, None
+            for facilidade_entra in range(self.p, self.m):
+                deltas = self.troca_rapida.deltas_troca(self.facilidades[facilidade_entra])[abertas]
+                facilidade_sai = int(deltas.argmax())
+                if deltas[facilidade_sai] > melhor_delta:
+                    melhor_delta = deltas[facilidade_sai]
+                    melhor_troca = (facilidade_sai, facilidade_entra)
+            if melhor_troca is None:
+                return self.custo_atual
+            self.aplica_trocas([melhor_troca])
+            self.custo_atual = self.troca_rapida.custo()
 
     def aceita_melhora(self, custo_vizinho):
         # aceitar a solucao vizinha se ela for melhor
@@ -112,25 +156,61 @@ class SimulatedAnnealing:
 
     def executa(self):
         facilidades = self.gerar_solucao_inicial_gulosa()
-        self.facilidades = facilidades
-        self.melhor_solucao = facilidades
-        self.custo_atual = self.funcao_objetivo(facilidades)
+        self.inicia_troca_rapida(facilidades)
+        self.melhor_solucao = self.facilidades.copy()
         self.custo_solucao = self.custo_atual
+        self.historico = [(time.perf_counter(), self.custo_solucao)]
         print("*" * 50)
         print(f"Custo da solucao inicial: {self.custo_atual}")
         while self.temperatura > 0.1:
             for _ in range(self.sa_max):
-                vizinho = self.vizinhanca()
-                custo_vizinho = self.funcao_objetivo(vizinho)
+                trocas = self.sortear_trocas()
+                custo_vizinho = self.custo_trocas(trocas)
                 if self.aceita_melhora(custo_vizinho):
-                    self.facilidades = vizinho
+                    self.aplica_trocas(trocas)
                     self.custo_atual = custo_vizinho
-                    if custo_vizinho > self.funcao_objetivo(self.melhor_solucao):
-                        self.melhor_solucao = vizinho
+                    # custo_solucao guarda o custo da melhor solucao, sem reavalia-la
+                    if custo_vizinho > self.custo_solucao:
+                        self.melhor_solucao = self.facilidades.copy()
                         self.custo_solucao = custo_vizinho
+                        self.historico.append((time.perf_counter(), custo_vizinho))
             self.atualiza_temperatura()
         facilidades_abertas = self.melhor_solucao[: self.p]
         print(f"Melhor solucao: \n{facilidades_abertas}")
         print(f"Custo da melhor solucao: {self.custo_solucao}")
         print("*" * 50)
         return self.custo_solucao
+
+    def executa_vns(self, k_max=3, iteracoes=100):
+        # busca em vizinhanca variavel: perturba a melhor solucao com k trocas aleatorias,
+        # aplica a busca local e volta para k = 1 sempre que encontrar uma solucao melhor
+        self.inicia_troca_rapida(self.gerar_solucao_inicial_gulosa())
+        self.custo_solucao = self.busca_local()
+        self.melhor_solucao = self.facilidades.copy()
+        self.historico = [(time.perf_counter(), self.custo_solucao)]
+        print("*" * 50)
+        print(f"Custo da solucao inicial (busca local): {self.custo_solucao}")
+        for _ in range(iteracoes):
+            k = 1
+            while k <= k_max:
+                self.aplica_trocas(
+                    [
+                        (facilidade_sai, random.randint(self.p, self.m - 1))
+                        for facilidade_sai in random.sample(range(self.p), k)
+                    ]
+                )
+                self.custo_atual = self.troca_rapida.custo()
+                custo = self.busca_local()
+                if custo > self.custo_solucao:
+                    self.melhor_solucao = self.facilidades.copy()
+                    self.custo_solucao = custo
+                    self.historico.append((time.perf_counter(), custo))
+                    k = 1
+                else:
+                    self.inicia_troca_rapida(self.melhor_solucao)
+                    k += 1
+        facilidades_abertas = self.melhor_solucao[: self.p]
+        print(f"Melhor solucao: \n{facilidades_abertas}")
+        print(f"Custo da melhor solucao: {self.custo_solucao}")
+        print("*" * 50)
+        return self.custo_solucao
@@ -0,0 +1,80 @@
+import numpy as np
+
+
+class TrocaRapida:
+    # estrutura da troca rapida (fast interchange de Whitaker, Resende e Werneck)
+    # mantem, para cada cliente, a facilidade aberta mais proxima (phi1, d1) e a segunda
+    # mais proxima (phi2, d2), assim a variacao de custo de trocar uma facilidade aberta
+    # por uma fechada e calculada em O(n), sem refazer o atendimento de todos os clientes
+    def __init__(self, distancias, abertas):
+        self.distancias = distancias  # matriz m x n (facilidade j, cliente i)
+        self.m, self.n = distancias.shape
+        self.aberta = np.zeros(self.m, dtype=bool)
+        self.aberta[np.asarray(abertas)] = True
+        self.abertas = np.flatnonzero(self.aberta)
+        self.phi1, self.d1, self.phi2, self.d2 = self.dois_mais_proximos(np.arange(self.n))
+
+    def dois_mais_proximos(self, clientes):
+        abertas = self.abertas
+        distancias = self.distancias[abertas[:, None], clientes]
+        colunas = np.arange(len(clientes))
+        if len(abertas) == 1:
+            sem_segunda = np.full(len(clientes), -1)
+            return np.repeat(abertas, len(clientes)), distancias[0], sem_segunda, np.full(len(clientes), np.inf)
+        primeira = distancias.argmin(axis=0)
+        d_primeira = distancias[primeira, colunas]
+        distancias[primeira, colunas] = np.inf
+        segunda = distancias.argmin(axis=0)
+        return abertas[primeira], d_primeira, abertas[segunda], distancias[segunda, colunas]
+
+    def custo(self):
+        return float(self.d1.sum())
+
+    def delta_troca(self, entra, sai):
+        # variacao do custo ao abrir `entra` e fechar `sai`
+        d_entra = self.distancias[entra]
+        ganho = np.minimum(d_entra - self.d1, 0).sum()
+        perdem = (self.phi1 == sai) & (d_entra >= self.d1)
+        perda = (np.minimum(d_entra[perdem], self.d2[perdem]) - self.d1[perdem]).sum()
+        return float(ganho + perda)
+
+    def deltas_troca(self, entra):
+        # variacao do custo ao abrir `entra` e fechar cada uma das facilidades (indice = facilidade)
+        # so as posicoes das facilidades abertas tem significado
+        d_entra = self.distancias[entra]
+        ganho = np.minimum(d_entra - self.d1, 0).sum()
+        perdem = d_entra >= self.d1
+        perda = np.bincount(
+            self.phi1[perdem],
+            weights=(np.minimum(d_entra, self.d2) - self.d1)[perdem],
+            minlength=self.m,
+        )
+        return ganho + perda
+
+    def aplica_troca(self, entra, sai):
+        self.aberta[sai] = False
+        self.aberta[entra] = True
+        self.abertas[self.abertas == sai] = entra
+        d_entra = self.distancias[entra]
+        afetados = (self.phi1 == sai) | (self.phi2 == sai)
+        # clientes que nao perderam facilidade so mudam se `entra` for melhor que a segunda
+        melhoram = np.flatnonzero((d_entra < self.d2) & ~afetados)
+        if len(melhoram):
+            primeira = d_entra[melhoram] < self.d1[melhoram]
+            segunda = melhoram[~primeira]
+            primeira = melhoram[primeira]
+            self.phi2[primeira] = self.phi1[primeira]
+            self.d2[primeira] = self.d1[primeira]
+            self.phi1[primeira] = entra
+            self.d1[primeira] = d_entra[primeira]
+            self.phi2[segunda] = entra
+            self.d2[segunda] = d_entra[segunda]
+        # clientes que perderam uma das duas facilidades sao recalculados com as abertas
+        clientes = np.flatnonzero(afetados)
+        if len(clientes):
+            (
+                self.phi1[clientes],
+                self.d1[clientes],
+                self.phi2[clientes],
+                self.d2[clientes],
+            ) = self.dois_mais_proximos(clientes)
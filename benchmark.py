@@ -0,0 +1,243 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+PMEDIAN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Pesquisa_Operacional-main")
+PMEDIAN_INSTANCE = os.path.join(PMEDIAN_DIR, "pmed40.txt.table.p56.B")
+
+
+@dataclass
+class BenchmarkResult:
+    solver: str
+    instance: str
+    seed: int
+    size: dict = field(default_factory=dict)
+    load_seconds: float = 0.0
+    initial_cost: float = 0.0
+    best_cost: float = 0.0
+    target_cost: float = 0.0
+    time_to_target: Optional[float] = None
+    iterations: int = 0
+    seconds: float = 0.0
+    iterations_per_second: float = 0.0
+    peak_rss_mb: Optional[float] = None
+    error: Optional[str] = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20
+
+
+def time_to_target(history, started, target, minimize=True) -> Optional[float]:
+    """Seconds from `started` until the first (instant, cost) in history reaching target."""
+    for instant, cost in history:
+        if (cost <= target) if minimize else (cost >= target):
+            return instant - started
+    return None
+
+
+def run_wave_annealing(seed, stock_layout_file, product_boxes_file, iterations, improvement) -> BenchmarkResult:
+    from instance_cache import load_instance
+    from simulated_annealing import Config, SimulatedAnnealing
+    from telemetry import Telemetry
+
+    random.seed(seed)
+    result = BenchmarkResult("simulated_annealing", os.path.basename(product_boxes_file), seed)
+    started = time.perf_counter()
+    instance = load_instance(stock_layout_file, product_boxes_file, use_cache=False)
+    telemetry = Telemetry(capacity=iterations)
+    sa = SimulatedAnnealing(instance.stock_layout, instance.product_boxes, Config(sa_max=iterations), telemetry)
+    sa.fill_boxes()
+    sa.fill_corridors(instance.inventory())
+    result.load_seconds = time.perf_counter() - started
+
+    sa.start()
+    result.initial_cost = sa.solution_cost
+    result.target_cost = sa.solution_cost * (1 - improvement)
+    started = time.perf_counter()
+    sa.anneal(iterations)
+    result.seconds = time.perf_counter() - started
+    sa.finish()
+    # telemetry times are counted from the end of start()
+    history = [(0.0, result.initial_cost)] + [(row["seconds"], row["best_cost"]) for row in telemetry.rows()]
+
+    result.best_cost = sa.solution_cost
+    result.iterations = sa.iteration
+    result.iterations_per_second = sa.iteration / result.seconds if result.seconds else 0.0
+    result.time_to_target = time_to_target(history, 0.0, result.target_cost)
+    return result
+
+
+def run_pmedian(seed, solver, improvement) -> BenchmarkResult:
+    # the p-median package uses flat imports from its own directory
+    sys.path.insert(0, PMEDIAN_DIR)
+    from ManipuladorArquivo import ManipuladorArquivo
+    from genetic_algorithm_p_medians import GeneticAlgorithm
+    from simulated_annealing_p_medians import SimulatedAnnealing as PMedianAnnealing
+
+    random.seed(seed)
+    result = BenchmarkResult(solver, os.path.basename(PMEDIAN_INSTANCE), seed)
+    started = time.perf_counter()
+    ma = ManipuladorArquivo(PMEDIAN_INSTANCE, usar_cache=False)
+    args = (
+        ma.obter_n_clients(), ma.obter_clientes(), ma.obter_m_facilities(),
+        ma.obter_facilidades(), ma.obter_p_desired_facilities(), ma.obter_distancias_facilidades(),
+    )
+    result.size = {"clients": args[0], "facilities": args[2], "p": args[4]}
+    result.load_seconds = time.perf_counter() - started
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if solver == "pmedian_simulated_annealing":
+            model = PMedianAnnealing(*args, 10000, 0.99, 20)
+            started = time.perf_counter()
+            model.executa()
+            # one pass of sa_max iterations per temperature, until it falls below 0.1
+            result.iterations = model.sa_max * int(np.ceil(np.log(0.1 / model.temperatura_inicial) / np.log(model.alpha)))
+        else:
+            model = GeneticAlgorithm(*args)
+            started = time.perf_counter()
+            model.executar()
+            result.iterations = model.n_geracoes
+    result.seconds = time.perf_counter() - started
+
+    # this package maximizes its objective, so the target lies above the initial cost
+    result.initial_cost = model.historico[0][1]
+    result.best_cost = model.custo_solucao
+    result.target_cost = result.initial_cost * (1 + improvement)
+    result.iterations_per_second = result.iterations / result.seconds if result.seconds else 0.0
+    result.time_to_target = time_to_target(model.historico, started, result.target_cost, minimize=False)
+    return result
+
+
+def _case_worker(queue, case, seed, args) -> None:
+    try:
+        result = case(seed, *args)
+    except Exception as e:
+        result = BenchmarkResult(case.__name__, "", seed, error=repr(e))
+    result.peak_rss_mb = peak_rss_mb()
+    queue.put(asdict(result))
+
+
+def run_case(case, seed, *args) -> dict:
+    """Run case(seed, *args) in a fresh process, so its peak memory is its own."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_case_worker, args=(queue, case, seed, args))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def generate_family(directory, sizes: Sequence[int], number_products, number_corridors, seed) -> List[dict]:
+    """Write one GenerateInstances stock/boxes pair per number of boxes."""
+    from generate_instances import GenerateInstances
+
+    family = []
+    for number_boxes in sizes:
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            instances = GenerateInstances(number_boxes, number_products, 6, number_corridors, 5, seed=seed)
+        stock_layout_file = os.path.join(directory, f"stock_{number_boxes}.csv")
+        product_boxes_file = os.path.join(directory, f"boxes_{number_boxes}.csv")
+        instances.stock_to_csv(stock_layout_file)
+        instances.box_to_csv(product_boxes_file)
+        family.append({
+            "stock_layout_file": stock_layout_file,
+            "product_boxes_file": product_boxes_file,
+            "size": {
+                "boxes": number_boxes,
+                "products": number_products,
+                "corridors": number_corridors,
+                "box_rows": int(instances.box_rows.sum()),
+                "stock_rows": len(instances.column_corridor),
+            },
+            "generate_seconds": time.perf_counter() - started,
+        })
+    return family
+
+
+def benchmark(
+        sizes: Sequence[int] = (100, 200, 400),
+        number_products: int = 100,
+        number_corridors: int = 165,
+        seeds: Sequence[int] = (0,),
+        iterations: int = 300,
+        improvement: float = 0.05,
+        pmedian: bool = True,
+) -> dict:
+    """Benchmark the wave-picking annealing on a generated instance family (and the
+    p-median solvers on the bundled pmed instance) and return a JSON-ready report."""
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for instance in generate_family(directory, sizes, number_products, number_corridors, seed=42):
+            for seed in seeds:
+                result = run_case(
+                    run_wave_annealing, seed, instance["stock_layout_file"], instance["product_boxes_file"],
+                    iterations, improvement,
+                )
+                result["size"] = {**instance["size"], "generate_seconds": instance["generate_seconds"]}
+                results.append(result)
+    if pmedian:
+        for solver in ("pmedian_simulated_annealing", "pmedian_genetic_algorithm"):
+            for seed in seeds:
+                results.append(run_case(run_pmedian, seed, solver, improvement))
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parameters": {
+            "sizes": list(sizes),
+            "number_products": number_products,
+            "number_corridors": number_corridors,
+            "seeds": list(seeds),
+            "iterations": iterations,
+            "improvement": improvement,
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the wave-picking and p-median solvers.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 200, 400], help="numbers of boxes of the generated instances")
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--corridors", type=int, default=165)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+    parser.add_argument("--iterations", type=int, default=300, help="annealing iterations (sa_max) per run")
+    parser.add_argument("--improvement", type=float, default=0.05, help="target: this fraction better than the initial cost")
+    parser.add_argument("--no-pmedian", action="store_true")
+    parser.add_argument("--output", default="benchmark_report.json")
+    args = parser.parse_args()
+
+    report = benchmark(args.sizes, args.products, args.corridors, args.seeds, args.iterations, args.improvement, not args.no_pmedian)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    for result in report["results"]:
+        print(
+            f"{result['solver']:<30} {result['instance']:<26} seed={result['seed']} "
+            f"load={result['load_seconds']:.2f}s it/s={result['iterations_per_second']:.1f} "
+            f"best={result['best_cost']:.2f} ttt={result['time_to_target']} "
+            f"rss={result['peak_rss_mb']}MB{' error=' + result['error'] if result['error'] else ''}"
+        )
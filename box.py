@@ -1,32 +1,78 @@
+from typing import Dict, Sequence
+
+import numpy as np
+
 from product import Product
 
 class Box:
+    """An order box: the SKU quantities it asks for, its wave and the corridors serving it.
+
+    Boxes are __slots__ records; products maps SKU -> quantity (repeated rows of a SKU are
+    merged) and total_products is kept as products are added, so SKU lookups and the piece
+    total are O(1).
+    """
+
+    __slots__ = ("id", "wave_class", "products", "total_products", "wave", "corridors")
+
     def __init__(self, box_id: int, wave_class: str):
         self.wave_class = wave_class
-        self.products = []
+        self.products: dict[str, int] = {}
+        self.total_products = 0
         self.wave = None
-        self.corridors: dict[str, set[str]] = {}
+        self.corridors: dict[int, set[str]] = {}
         self.id = box_id
 
+    @classmethod
+    def from_rows(cls, box_ids: Sequence[int], wave_classes: Sequence[str], skus: Sequence[str], quantities: Sequence[int]) -> Dict[int, "Box"]:
+        """Build every box of the product_boxes rows at once, in order of first appearance."""
+        box_ids = np.asarray(box_ids).astype(np.int64)
+        quantities = np.asarray(quantities).astype(np.int64)
+        unique_ids, first_rows, inverse = np.unique(box_ids, return_index=True, return_inverse=True)
+        # rows grouped by box, keeping the file order within each box
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.zeros(len(unique_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(inverse, minlength=len(unique_ids)), out=bounds[1:])
+        totals = np.zeros(len(unique_ids), dtype=np.int64)
+        np.add.at(totals, inverse, quantities)
+        row_skus = np.asarray(skus, dtype=object)[order].tolist()
+        row_quantities = quantities[order].tolist()
+
+        boxes = {}
+        for group in np.argsort(first_rows, kind="stable").tolist():
+            box = cls(int(unique_ids[group]), wave_classes[first_rows[group]])
+            start, stop = bounds[group:group + 2].tolist()
+            products = box.products
+            for sku, quantity in zip(row_skus[start:stop], row_quantities[start:stop]):
+                products[sku] = products.get(sku, 0) + quantity
+            box.total_products = int(totals[group])
+            boxes[box.id] = box
+        return boxes
+
     def add_product(self, sku: str, quantity: int):
-        self.products.append(Product(sku, quantity))
+        self.products[sku] = self.products.get(sku, 0) + quantity
+        self.total_products += quantity
 
     def set_wave(self, wave):
         self.wave = wave
 
-    def add_corridor(self, corridor:str, product_sku: str):
+    def add_corridor(self, corridor: int, product_sku: str):
         if corridor not in self.corridors:
             self.corridors[corridor] = set()
         self.corridors[corridor].add(product_sku)
 
+    def remove_corridor_product(self, corridor: int, product_sku: str):
+        self.corridors[corridor].discard(product_sku)
+        if not self.corridors[corridor]:
+            del self.corridors[corridor]
+
     def find_product(self, sku: str):
-        for product in self.products:
-            if product.sku == sku:
-                return product
-        return None
+        quantity = self.products.get(sku)
+        if quantity is None:
+            return None
+        return Product(sku, quantity)
 
     def get_total_products(self):
-        return sum([product.quantity for product in self.products])
+        return self.total_products
 
     def get_corridors(self):
-        return self.corridors.keys()
\ No newline at end of file
+        return self.corridors.keys()
@@ -1,28 +1,54 @@
+from typing import Dict
+
+import numpy as np
+
+from inventory import Inventory
 from product import Product
 
 class Corridor:
-    def __init__(self, floor: int):
+    """View over one corridor of the shared Inventory arrays."""
+
+    def __init__(self, floor: int, inventory: Inventory, corridor_id: int):
         self.floor = floor
-        self.products = []
+        self.inventory = inventory
+        self.id = corridor_id
+
+    @property
+    def products(self):
+        return [Product(sku, quantity) for sku, quantity in self.inventory.corridor_stock(self.id).items()]
 
     def add_product(self, sku: str, quantity: int):
-        self.products.append(Product(sku, quantity))
+        slot = self.inventory.find_slot(self.id, sku)
+        if slot is None:
+            slot = self.inventory.add_slot(self.id, sku)
+        self.inventory.put(slot, quantity)
+
+    def refill(self, products: Dict[str, int]):
+        """Give back several SKUs at once."""
+        slots = [self.inventory.find_slot(self.id, sku) for sku in products]
+        if None in slots:
+            for sku, quantity in products.items():
+                self.add_product(sku, quantity)
+            return
+        self.inventory.refill(np.array(slots), np.fromiter(products.values(), dtype=np.int64, count=len(products)))
+
+    def take(self, products: Dict[str, int]):
+        """Withdraw several SKUs at once, undoing a refill."""
+        slots = np.array([self.inventory.find_slot(self.id, sku) for sku in products])
+        self.inventory.consume(slots, np.fromiter(products.values(), dtype=np.int64, count=len(products)))
 
     def find_product(self, sku: str):
-        """Search for a product by SKU in the box."""
-        for product in self.products:
-            if product.sku == sku:
-                return product
-        return None
+        """Search for a product by SKU in the corridor."""
+        slot = self.inventory.find_slot(self.id, sku)
+        if slot is None or self.inventory.stock[slot] == 0:
+            return None
+        return Product(sku, int(self.inventory.stock[slot]))
 
     def consume_product(self, sku: str, quantity: int):
         """Remove a product from the corridor."""
-        for product in self.products:
-            if product.sku == sku:
-                if quantity >= product.quantity:
-                    remaining = quantity - product.quantity
-                    self.products.remove(product)
-                else:
-                    remaining = 0
-                    product.quantity -= quantity
-                return remaining
+        slot = self.inventory.find_slot(self.id, sku)
+        if slot is None:
+            return None
+        if self.inventory.stock[slot] == 0:
+            return None
+        return self.inventory.take(slot, quantity)
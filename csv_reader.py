@@ -1,17 +1,108 @@
-import pandas as pd
+import hashlib
+import json
+import os
+
+import numpy as np
+
+CACHE_DIR = ".instance_cache"
+
+
+def file_hash(file) -> str:
+    digest = hashlib.sha1()
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_path(file, name) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(file)), CACHE_DIR, name)
+
+
+def save_arrays(path, arrays, meta=None) -> None:
+    """Write a bundle of .npy files, renaming it into place once complete."""
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    os.makedirs(tmp_path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), array)
+    with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+        json.dump({"arrays": list(arrays), **(meta or {})}, f)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # another run wrote the same bundle first
+        for name in os.listdir(tmp_path):
+            os.remove(os.path.join(tmp_path, name))
+        os.rmdir(tmp_path)
+
+
+def load_arrays(path):
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in meta["arrays"]}
+    return arrays, meta
 
 
 class CSVReader:
-    def __init__(self, file):
-        self.df = pd.read_csv(file)
+    """Column reader for the instance CSVs.
 
-    def get_column_values(self, column):
-        df_column =  self.df[column]
-        column_array = df_column.to_numpy()
-        return column_array
+    The first read of a file goes through pandas and is stored as a bundle of memory-mapped
+    .npy files keyed by the file hash (string columns as integer codes plus vocabulary), so
+    later runs skip both the CSV parsing and the pandas import.
+    """
+
+    def __init__(self, file, use_cache=True):
+        self.file = file
+        self.codes = {}
+        self.vocabularies = {}
+        self.values = {}
+        path = cache_path(file, f"{os.path.basename(file)}.{file_hash(file)[:16]}") if use_cache else None
+        if path and os.path.isdir(path):
+            arrays, meta = load_arrays(path)
+            self.columns = meta["columns"]
+            for column in self.columns:
+                if column in meta["coded"]:
+                    self.codes[column] = arrays[f"{column}.codes"]
+                    self.vocabularies[column] = arrays[f"{column}.vocabulary"].astype(object)
+                else:
+                    self.values[column] = arrays[column]
+        else:
+            self.read_csv()
+            if path:
+                self.write_cache(path)
+
+    def read_csv(self):
+        import pandas as pd
 
+        df = pd.read_csv(self.file)
+        self.columns = list(df.columns)
+        for column in self.columns:
+            column_array = df[column].to_numpy()
+            if column_array.dtype == object:
+                codes, vocabulary = pd.factorize(column_array)
+                self.codes[column] = codes.astype(np.int32)
+                self.vocabularies[column] = np.asarray(vocabulary, dtype=object)
+            else:
+                self.values[column] = column_array
 
-# df1 = pd.read_csv("file1.csv")
+    def write_cache(self, path):
+        arrays = dict(self.values)
+        for column, codes in self.codes.items():
+            arrays[f"{column}.codes"] = codes
+            arrays[f"{column}.vocabulary"] = self.vocabularies[column].astype(str)
+        save_arrays(path, arrays, {"columns": self.columns, "coded": list(self.codes)})
+
+    @property
+    def df(self):
+        import pandas as pd
+
+        return pd.DataFrame({column: self.get_column_values(column) for column in self.columns})
+
+    def get_column_values(self, column):
+        if column in self.codes:
+            return self.vocabularies[column][self.codes[column]]
+        return self.values[column]
 
-# # Read the second CSV file
-# df2 = pd.read_csv("file2.csv")
+    def get_column_codes(self, column):
+        """Integer codes and vocabulary of a string column."""
+        return self.codes[column], self.vocabularies[column]
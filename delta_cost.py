@@ -0,0 +1,94 @@
+import math
+from collections import defaultdict
+from typing import Dict
+
+from wave import Wave
+
+
+class DeltaCost:
+    """Keeps the value of SimulatedAnnealing.calculate_fo up to date incrementally.
+
+    Waves report corridor additions/removals through their cost_tracker, which keeps a
+    global usage counter per corridor for the overlap punishment. Only waves touched since
+    the last read are re-scored, so a move costs time proportional to what it changed.
+    """
+
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+        self.reset()
+
+    def reset(self) -> None:
+        self.waves: Dict[int, Wave] = {}
+        self.wave_area: Dict[int, int] = {}
+        self.wave_punishment: Dict[int, int] = {}
+        self.corridor_usage: Dict[int, int] = defaultdict(int)
+        self.dirty_waves: Dict[int, Wave] = {}
+        self.total_area = 0
+        self.total_punishment = 0
+        self.corridor_overlaps = 0
+
+    def attach(self, waves: Dict[int, Wave]) -> None:
+        self.reset()
+        for wave in waves.values():
+            self.add_wave(wave)
+
+    def add_wave(self, wave: Wave) -> None:
+        wave.cost_tracker = self
+        self.waves[wave.id] = wave
+        for corridor_id in wave.corridors:
+            self.corridor_added(wave, corridor_id)
+        self.dirty_waves[wave.id] = wave
+
+    def remove_wave(self, wave: Wave) -> None:
+        for corridor_id in wave.corridors:
+            self.corridor_removed(wave, corridor_id)
+        self.total_area -= self.wave_area.pop(wave.id, 0)
+        self.total_punishment -= self.wave_punishment.pop(wave.id, 0)
+        self.dirty_waves.pop(wave.id, None)
+        del self.waves[wave.id]
+        wave.cost_tracker = None
+
+    def corridor_added(self, wave: Wave, corridor_id: int) -> None:
+        self.corridor_usage[corridor_id] += 1
+        if self.corridor_usage[corridor_id] > 1:
+            self.corridor_overlaps += 1
+        self.dirty_waves[wave.id] = wave
+
+    def corridor_removed(self, wave: Wave, corridor_id: int) -> None:
+        self.corridor_usage[corridor_id] -= 1
+        if self.corridor_usage[corridor_id] > 0:
+            self.corridor_overlaps -= 1
+        else:
+            del self.corridor_usage[corridor_id]
+        self.dirty_waves[wave.id] = wave
+
+    def wave_changed(self, wave: Wave) -> None:
+        self.dirty_waves[wave.id] = wave
+
+    def refresh(self) -> None:
+        for wave_id, wave in self.dirty_waves.items():
+            area = self.evaluator.calculate_area(wave)
+            punishment = (
+                self.evaluator.calculate_punishment_floor(wave)
+                + self.evaluator.calculate_punishment_class(wave)
+                + self.evaluator.calculate_punishment_capacity(wave)
+            )
+            self.total_area += area - self.wave_area.get(wave_id, 0)
+            self.total_punishment += punishment - self.wave_punishment.get(wave_id, 0)
+            self.wave_area[wave_id] = area
+            self.wave_punishment[wave_id] = punishment
+        self.dirty_waves.clear()
+
+    def cost(self) -> float:
+        self.refresh()
+        if not self.waves:
+            return float('inf')
+        corridor_punishment = self.corridor_overlaps * self.evaluator.config.corridor_punishment_weight
+        return self.total_area / len(self.waves) + self.total_punishment + corridor_punishment
+
+    def check(self, waves: Dict[int, Wave]) -> float:
+        """Return the incremental cost, asserting it matches a full recomputation."""
+        cost = self.cost()
+        full_cost = self.evaluator.calculate_fo(waves)
+        assert math.isclose(cost, full_cost), f"Delta cost {cost} differs from full cost {full_cost}"
+        return cost
@@ -1,168 +1,186 @@
-from random import random, randint, choice
+from typing import Iterator, Tuple
 
 import numpy as np
 import pandas as pd
-import openpyxl
 
 
 class GenerateInstances:
-    def __init__(self, number_boxes, number_products, number_wave_class, number_corridors, number_corridors_floor, seed=42):
+    """Seeded synthetic warehouse instances, generated column-wise with NumPy.
+
+    Boxes are produced in chunks of `chunk_boxes` boxes, each drawn from its own child
+    seed, so the box table can be streamed to disk chunk by chunk (and regenerated
+    identically) without ever holding it whole in memory.
+    """
+
+    def __init__(self, number_boxes, number_products, number_wave_class, number_corridors, number_corridors_floor, seed=42, chunk_boxes=10000):
         self.number_boxes = number_boxes
         self.number_products = number_products
-        self.wave_classes = [f"CLASSE_ONDA_{i + 1}" for i in range(number_wave_class)]
-        self.boxes_ids = [box_id for box_id in range(1, number_boxes + 1)]
-        self.corridors_ids = [corridor_id for corridor_id in range(1, number_corridors + 1)]
-        self.products = [f"SKU_{i + 1}" for i in range(number_products)]
-        self.product_demand = dict(zip(self.products, [0 for _ in range(number_products)]))
+        self.wave_classes = np.array([f"CLASSE_ONDA_{i + 1}" for i in range(number_wave_class)])
+        self.boxes_ids = np.arange(1, number_boxes + 1)
+        self.corridors_ids = np.arange(1, number_corridors + 1)
+        self.products = np.array([f"SKU_{i + 1}" for i in range(number_products)])
         self.seed = seed
+        self.chunk_boxes = chunk_boxes
         self.number_floors = -(-number_corridors // number_corridors_floor)
-        self.column_box = self.generate_column_box()
-        self.column_products = self.generate_column_products()
-        self.column_number_products = self.generate_column_number_products()
-        self.column_wave_class = self.generate_column_wave_class()
+
+        seed_sequence = np.random.SeedSequence(seed)
+        box_seed, stock_seed, *self.chunk_seeds = seed_sequence.spawn(2 + -(-number_boxes // chunk_boxes))
+        rng = np.random.default_rng(box_seed)
+        self.box_rows = np.maximum(1, (rng.random(number_boxes) * number_products).astype(np.int64))
+        self.box_classes = rng.integers(0, number_wave_class, number_boxes)
+
+        demand = np.zeros(number_products, dtype=np.int64)
+        for _, _, _, products in self.iter_box_chunks(encoded=True):
+            demand += products[1]
+        self.rng = np.random.default_rng(stock_seed)
         self.column_corridor = self.generate_column_corridor()
         self.column_floor = self.generate_column_floor()
-        self.column_corridor_products, self.column_corridor_products_quantities = self.generate_column_corridor_products()
-        self.ensure_product_demand_met()
-
-    def generate_column_box(self) -> np.array:
-        column_box = np.array([])
-        for box_id in self.boxes_ids:
-            number_of_products = max(1, int(random() * self.number_products))
-            column_box = np.concatenate((column_box, np.full(number_of_products, box_id)))
-        return column_box
-
-    def generate_column_products(self) -> np.array:
-        column_products = np.array([])
-        for i in range(len(self.column_box)):
-            product = self.products[int(random() * self.number_products)]
-            column_products = np.concatenate((column_products, np.array([product])))
-        return column_products
-
-    def generate_column_number_products(self) -> np.array:
-        column_number_products = np.array([])
+        self.corridor_product_ids, self.column_corridor_products_quantities = self.generate_column_corridor_products(demand)
+        self.ensure_product_demand_met(demand)
+        self.product_demand = dict(zip(self.products.tolist(), demand.tolist()))
+        self.column_corridor_products = self.products[self.corridor_product_ids]
+        self._box_columns = None
+
+    def generate_box_chunk(self, chunk: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Box id, pieces, wave class index and product index of every row in a chunk of boxes."""
+        rng = np.random.default_rng(self.chunk_seeds[chunk])
+        first, last = chunk * self.chunk_boxes, min((chunk + 1) * self.chunk_boxes, self.number_boxes)
+        rows = self.box_rows[first:last]
+        column_box = np.repeat(self.boxes_ids[first:last], rows)
+        column_wave_class = np.repeat(self.box_classes[first:last], rows)
+        column_products = rng.integers(0, self.number_products, len(column_box))
+
+        # smaller numbers of pieces have higher probabilities (weights 1/n for n in 1..50)
         numbers = np.arange(1, 51)
-
-        # Define weights: smaller numbers have higher probabilities
-        weights = 1 / numbers  # Inverse distribution (small numbers = higher prob)
-        weights /= weights.sum()  # Normalize to sum = 1
-        for i in range(len(self.column_box)):
-            chosen_number = np.random.choice(numbers, p=weights)
-            self.product_demand[self.column_products[i]] += chosen_number
-            column_number_products = np.concatenate((column_number_products, np.array([chosen_number])))
-        return column_number_products
-
-    def generate_column_wave_class(self) -> np.array:
-        column_wave_class = np.array([])
-        current_box = self.column_box[0]
-        wave_class = None
-        for i, box in enumerate(self.column_box):
-            if not wave_class or box != current_box:
-                wave_class = self.wave_classes[int(random() * len(self.wave_classes))]
-                current_box = box
-            column_wave_class = np.concatenate((column_wave_class, np.array([wave_class])))
-        return column_wave_class
-
-    def generate_column_corridor(self) -> np.array:
-        column_corridor = np.array([])
-        for i in range(len(self.corridors_ids)):
-            corridor_repeat = random() * 10
-            column_corridor = np.concatenate((column_corridor, np.full(int(corridor_repeat), self.corridors_ids[i])))
-        return column_corridor
-
-    def generate_column_floor(self) -> np.array:
-        column_corridor_floor = np.array([])
-        actual_floor = 1
-        actual_corridor = self.column_corridor[0]
-        for i, corridor in enumerate(self.column_corridor):
-            if corridor != actual_corridor:
-                actual_floor = randint(1, self.number_floors)
-                actual_corridor = corridor
-            column_corridor_floor = np.concatenate((column_corridor_floor, np.array([actual_floor])))
-        return column_corridor_floor
-
-
-    def generate_column_corridor_products(self) -> np.array:
-        column_corridor_products = np.array([])
-        column_corridor_products_quantities = np.array([])
-        current_corridor = self.column_corridor[0]
-        corridor_products = []
-        for i, corridor in enumerate(self.column_corridor):
-            if corridor != current_corridor:
-                corridor_products.clear()
-            products_with_demand = list(self.product_demand.keys())
-            possible_products = list(set(products_with_demand) - set(corridor_products))
-            if not possible_products:
-                product = self.products[int(random() * len(corridor_products))]
+        weights = 1 / numbers
+        weights /= weights.sum()
+        column_number_products = rng.choice(numbers, size=len(column_box), p=weights)
+        return column_box, column_number_products, column_wave_class, column_products
+
+    def iter_box_chunks(self, encoded=False) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """Yield (box, pieces, wave class, sku) columns chunk by chunk.
+
+        With encoded=True the wave class and sku columns are indexes into wave_classes and
+        products, and the sku entry is a (product index, per-product demand) pair.
+        """
+        for chunk in range(len(self.chunk_seeds)):
+            column_box, column_number_products, column_wave_class, column_products = self.generate_box_chunk(chunk)
+            if encoded:
+                demand = np.bincount(column_products, weights=column_number_products, minlength=self.number_products)
+                yield column_box, column_number_products, column_wave_class, (column_products, demand.astype(np.int64))
             else:
-                product = possible_products[int(random() * len(possible_products))]
-            corridor_products.append(product)
-            quantity = randint(1, 500)
-            self.product_demand[product] -= quantity
-            if self.product_demand[product] <= 0:
-                products_with_demand.remove(product)
-            column_corridor_products = np.concatenate((column_corridor_products, np.array([product])))
-            column_corridor_products_quantities = np.concatenate((column_corridor_products_quantities, np.array([quantity])))
-        return column_corridor_products, column_corridor_products_quantities
-
-    def ensure_product_demand_met(self):
-        for product, demand in self.product_demand.items():
-            if demand > 0:
-                corridors_with_product = [
-                    (idx, corridor)
-                    for idx, corridor in enumerate(self.column_corridor_products)
-                    if corridor == product
-                ]
-
-                if corridors_with_product:
-                    chosen_idx, chosen_corridor = choice(corridors_with_product)
-
-                    self.column_corridor_products_quantities[chosen_idx] += demand
-                    self.product_demand[product] = 0
-
-                    print(f"Ajustado: {product} no corredor {chosen_corridor} (+{demand})")
-                else:
-                    print(f"Atenção! Nenhum corredor disponível para atender {product}.")
+                yield column_box, column_number_products, self.wave_classes[column_wave_class], self.products[column_products]
+
+    def generate_column_corridor(self) -> np.ndarray:
+        corridor_repeat = (self.rng.random(len(self.corridors_ids)) * 10).astype(np.int64)
+        return np.repeat(self.corridors_ids, corridor_repeat)
+
+    def generate_column_floor(self) -> np.ndarray:
+        # every corridor sits on one floor; the first one on floor 1
+        corridors, starts = np.unique(self.column_corridor, return_index=True)
+        floors = self.rng.integers(1, self.number_floors + 1, len(corridors))
+        if len(floors):
+            floors[np.argmin(starts)] = 1
+        return floors[np.searchsorted(corridors, self.column_corridor)]
+
+    def generate_column_corridor_products(self, demand: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # products are distinct within a corridor (sampled without replacement per corridor)
+        _, starts, counts = np.unique(self.column_corridor, return_index=True, return_counts=True)
+        column_products = np.empty(len(self.column_corridor), dtype=np.int64)
+        for start, count in zip(starts, counts):
+            column_products[start:start + count] = self.rng.choice(
+                self.number_products, size=count, replace=count > self.number_products
+            )
+        quantities = self.rng.integers(1, 501, len(column_products))
+        demand -= np.bincount(column_products, weights=quantities, minlength=self.number_products).astype(np.int64)
+        return column_products, quantities
+
+    def ensure_product_demand_met(self, demand: np.ndarray) -> None:
+        # a random stock row of each under-stocked product receives the missing pieces
+        order = self.rng.permutation(len(self.corridor_product_ids))
+        stocked_products, first = np.unique(self.corridor_product_ids[order], return_index=True)
+        chosen_rows = order[first]
+        missing = demand[stocked_products] > 0
+        self.column_corridor_products_quantities[chosen_rows[missing]] += demand[stocked_products[missing]]
+        demand[stocked_products[missing]] = 0
+
+        print(f"Ajustados: {int(missing.sum())} produtos")
+        unavailable = int((demand > 0).sum())
+        if unavailable:
+            print(f"Atenção! Nenhum corredor disponível para atender {unavailable} produtos.")
 
     def stock(self):
         return self.column_floor, self.column_corridor, self.column_corridor_products, self.column_corridor_products_quantities
 
     def box(self):
-        return self.column_box,self.column_number_products,  self.column_wave_class, self.column_products
-
-    def box_to_csv(self):
-        box = self.box()
-        df = pd.DataFrame({
-            "CAIXA": box[0],
-            "PECAS": box[1],
-            "CLASSE_ONDA": box[2],
-            "SKU": box[3]
-        })
-        df.to_csv("box.csv", index=False)
+        if self._box_columns is None:
+            chunks = list(zip(*self.iter_box_chunks()))
+            self._box_columns = tuple(np.concatenate(column) for column in chunks)
+        return self._box_columns
+
+    @property
+    def column_box(self):
+        return self.box()[0]
+
+    @property
+    def column_number_products(self):
+        return self.box()[1]
+
+    @property
+    def column_wave_class(self):
+        return self.box()[2]
+
+    @property
+    def column_products(self):
+        return self.box()[3]
+
+    def box_frames(self) -> Iterator[pd.DataFrame]:
+        for column_box, column_number_products, column_wave_class, column_products in self.iter_box_chunks():
+            yield pd.DataFrame({
+                "CAIXA_ID": column_box,
+                "PECAS": column_number_products,
+                "CLASSE_ONDA": column_wave_class,
+                "SKU": column_products
+            })
 
-    def stock_to_csv(self):
+    def stock_frame(self) -> pd.DataFrame:
         stock = self.stock()
-        df = pd.DataFrame({
+        return pd.DataFrame({
             "ANDAR": stock[0],
             "CORREDOR": stock[1],
             "SKU": stock[2],
             "PECAS": stock[3]
         })
-        df.to_csv("stock.csv", index=False)
+
+    def box_to_csv(self, path="box.csv"):
+        for chunk, df in enumerate(self.box_frames()):
+            df.to_csv(path, mode="w" if chunk == 0 else "a", header=chunk == 0, index=False)
+
+    def stock_to_csv(self, path="stock.csv"):
+        self.stock_frame().to_csv(path, index=False)
+
+    def box_to_parquet(self, path="box.parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        for df in self.box_frames():
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+        if writer is not None:
+            writer.close()
+
+    def stock_to_parquet(self, path="stock.parquet"):
+        self.stock_frame().to_parquet(path, index=False)
 
     def generate_excel(self):
-        stock = self.stock()
         box = self.box()
         with pd.ExcelWriter('instances.xlsx') as writer:
-            df_stock = pd.DataFrame({
-                "ANDAR": stock[0],
-                "CORREDOR": stock[1],
-                "SKU": stock[2],
-                "PECAS": stock[3]
-            })
-            df_stock.to_excel(writer, sheet_name='Estoque', index=False)
+            self.stock_frame().to_excel(writer, sheet_name='Estoque', index=False)
             df_box = pd.DataFrame({
-                "CAIXA": box[0],
+                "CAIXA_ID": box[0],
                 "PECAS": box[1],
                 "CLASSE_ONDA": box[2],
                 "SKU": box[3]
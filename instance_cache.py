@@ -0,0 +1,109 @@
+import os
+from typing import Dict
+
+import numpy as np
+
+from csv_reader import CSVReader, cache_path, file_hash, load_arrays, save_arrays
+from inventory import Inventory
+
+
+class Instance:
+    """A stock_layout/product_boxes pair compiled to integer-coded arrays.
+
+    SKUs share one vocabulary across both files, stock rows point to dense corridor ids
+    and the SKU -> corridor index of the Inventory is stored precomputed, so a cached
+    instance is ready without parsing or interning anything.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        self.skus = arrays["skus"].astype(object)
+        self.wave_classes = arrays["wave_classes"].astype(object)
+        self.corridor_keys = arrays["corridor_keys"].astype(object)
+
+    @property
+    def stock_layout(self) -> Dict[str, np.ndarray]:
+        return {
+            "floor": self.arrays["stock_floor"],
+            "corridor": self.arrays["stock_corridor"],
+            "sku": self.skus[self.arrays["stock_sku"]],
+            "pieces": self.arrays["stock_pieces"],
+        }
+
+    @property
+    def product_boxes(self) -> Dict[str, np.ndarray]:
+        return {
+            "wave_id": self.arrays.get("box_wave_id", []),
+            "box_id": self.arrays["box_id"],
+            "box_pieces": self.arrays["box_pieces"],
+            "wave_class": self.wave_classes[self.arrays["box_wave_class"]],
+            "product_boxes_sku": self.skus[self.arrays["box_sku"]],
+        }
+
+    def inventory(self) -> Inventory:
+        """A fresh, writable Inventory (the cached stock itself is never modified)."""
+        return Inventory(
+            self.skus,
+            self.corridor_keys,
+            self.arrays["corridor_floors"],
+            self.arrays["slot_skus"],
+            self.arrays["slot_corridors"],
+            self.arrays["slot_stock"],
+        )
+
+
+def compile_instance(stock_layout_file, product_boxes_file, use_cache=True) -> Dict[str, np.ndarray]:
+    stock_layout = CSVReader(stock_layout_file, use_cache)
+    product_boxes = CSVReader(product_boxes_file, use_cache)
+    floors = stock_layout.get_column_values("ANDAR")
+    corridors = stock_layout.get_column_values("CORREDOR")
+    stock_skus = stock_layout.get_column_values("SKU")
+    inventory = Inventory.from_rows(
+        [f'{corridor}_{floor}' for corridor, floor in zip(corridors, floors)],
+        floors,
+        stock_skus,
+        stock_layout.get_column_values("PECAS"),
+    )
+
+    # SKUs demanded by boxes but absent from the stock come after the stocked ones
+    box_skus = product_boxes.get_column_values("SKU")
+    skus = list(inventory.skus)
+    sku_ids = dict(inventory.sku_ids)
+    for sku in box_skus:
+        if sku not in sku_ids:
+            sku_ids[sku] = len(skus)
+            skus.append(sku)
+    wave_class_codes, wave_classes = product_boxes.get_column_codes("CLASSE_ONDA")
+
+    arrays = {
+        "skus": np.array(skus, dtype=str),
+        "wave_classes": np.asarray(wave_classes, dtype=str),
+        "corridor_keys": np.array(inventory.corridor_keys, dtype=str),
+        "corridor_floors": inventory.corridor_floors,
+        "stock_floor": np.asarray(floors),
+        "stock_corridor": np.asarray(corridors),
+        "stock_sku": np.fromiter((sku_ids[sku] for sku in stock_skus), dtype=np.int32, count=len(stock_skus)),
+        "stock_pieces": np.asarray(stock_layout.get_column_values("PECAS")),
+        "slot_skus": inventory.slot_skus,
+        "slot_corridors": inventory.slot_corridors,
+        "slot_stock": inventory.stock,
+        "box_id": np.asarray(product_boxes.get_column_values("CAIXA_ID")),
+        "box_pieces": np.asarray(product_boxes.get_column_values("PECAS")),
+        "box_wave_class": np.asarray(wave_class_codes),
+        "box_sku": np.fromiter((sku_ids[sku] for sku in box_skus), dtype=np.int32, count=len(box_skus)),
+    }
+    if "ONDA_ID" in product_boxes.columns:
+        arrays["box_wave_id"] = np.asarray(product_boxes.get_column_values("ONDA_ID"))
+    return arrays
+
+
+def load_instance(stock_layout_file, product_boxes_file, use_cache=True) -> Instance:
+    """Load an instance pair, compiling it into a cached bundle keyed by both file hashes."""
+    if not use_cache:
+        return Instance(compile_instance(stock_layout_file, product_boxes_file, use_cache=False))
+    key = f"{file_hash(stock_layout_file)[:16]}{file_hash(product_boxes_file)[:16]}"
+    path = cache_path(stock_layout_file, f"instance.{key}")
+    if not os.path.isdir(path):
+        save_arrays(path, compile_instance(stock_layout_file, product_boxes_file))
+    arrays, _ = load_arrays(path)
+    return Instance(arrays)
@@ -0,0 +1,162 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+class Inventory:
+    """Warehouse stock held in flat NumPy arrays instead of per-SKU Product objects.
+
+    SKUs and corridor keys are interned to dense integer ids, and the corridor id is the
+    corridor identity everywhere past loading (corridor_keys maps it back). Every
+    (sku, corridor) pair is a slot; slots are sorted by SKU in CSR fashion (sku_indptr),
+    so the corridors holding a SKU are a contiguous slice and a single pair is found in
+    O(1) through slot_index. Within a SKU the slots follow the corridor position (floor, then corridor
+    number), and sku_remaining keeps the stock left of every SKU, so stock queries never
+    have to probe corridors one by one.
+    """
+
+    def __init__(
+            self,
+            skus: List[str],
+            corridor_keys: List[str],
+            corridor_floors: np.ndarray,
+            slot_skus: np.ndarray,
+            slot_corridors: np.ndarray,
+            stock: np.ndarray,
+    ):
+        self.skus = list(skus)
+        self.sku_ids: Dict[str, int] = {sku: sku_id for sku_id, sku in enumerate(self.skus)}
+        self.corridor_keys = list(corridor_keys)
+        self.corridor_ids: Dict[str, int] = {key: corridor_id for corridor_id, key in enumerate(self.corridor_keys)}
+        self.corridor_floors = np.asarray(corridor_floors, dtype=np.int64)
+        self.slot_skus = np.asarray(slot_skus, dtype=np.int64)
+        self.slot_corridors = np.asarray(slot_corridors, dtype=np.int64)
+        self.stock = np.array(stock, dtype=np.int64)
+        # corridor keys are "<corridor>_<floor>"
+        self.corridor_numbers = np.array([int(key.split("_")[0]) for key in self.corridor_keys], dtype=np.int64)
+        self.corridor_positions = np.empty(len(self.corridor_keys), dtype=np.int64)
+        self.corridor_positions[np.lexsort((self.corridor_numbers, self.corridor_floors))] = np.arange(len(self.corridor_keys))
+        self.corridor_parities = self.corridor_numbers % 2
+        # the same lookups as plain ints, for the per-pick work of Wave and SimulatedAnnealing
+        self.corridor_layout = list(zip(
+            self.corridor_numbers.tolist(), self.corridor_floors.tolist(), self.corridor_parities.tolist()
+        ))
+        self.index_slots()
+
+    @classmethod
+    def from_rows(cls, corridor_keys: Sequence[str], floors: Sequence[int], skus: Sequence[str], pieces: Sequence[int]) -> "Inventory":
+        """Intern the stock layout rows; repeated (corridor, sku) rows are merged into a single slot."""
+        sku_ids: Dict[str, int] = {}
+        corridor_ids: Dict[str, int] = {}
+        corridor_floors = []
+        row_corridors = np.empty(len(corridor_keys), dtype=np.int64)
+        row_skus = np.empty(len(corridor_keys), dtype=np.int64)
+        for row, (corridor_key, floor, sku) in enumerate(zip(corridor_keys, floors, skus)):
+            if corridor_key not in corridor_ids:
+                corridor_ids[corridor_key] = len(corridor_ids)
+                corridor_floors.append(int(floor))
+            if sku not in sku_ids:
+                sku_ids[sku] = len(sku_ids)
+            row_corridors[row] = corridor_ids[corridor_key]
+            row_skus[row] = sku_ids[sku]
+
+        pair_keys, inverse = np.unique(row_skus * len(corridor_ids) + row_corridors, return_inverse=True)
+        stock = np.zeros(len(pair_keys), dtype=np.int64)
+        np.add.at(stock, inverse, np.asarray(pieces, dtype=np.int64))
+        return cls(
+            list(sku_ids),
+            list(corridor_ids),
+            np.array(corridor_floors, dtype=np.int64),
+            pair_keys // len(corridor_ids),
+            pair_keys % len(corridor_ids),
+            stock,
+        )
+
+    def index_slots(self) -> None:
+        order = np.lexsort((self.corridor_positions[self.slot_corridors], self.slot_skus))
+        self.slot_skus = self.slot_skus[order]
+        self.slot_corridors = self.slot_corridors[order]
+        self.stock = self.stock[order]
+        self.sku_remaining = np.bincount(self.slot_skus, weights=self.stock, minlength=len(self.skus)).astype(np.int64)
+        self.sku_indptr = np.zeros(len(self.skus) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.slot_skus, minlength=len(self.skus)), out=self.sku_indptr[1:])
+        pair_keys = self.slot_skus * len(self.corridor_keys) + self.slot_corridors
+        self.slot_index: Dict[int, int] = dict(zip(pair_keys.tolist(), range(len(pair_keys))))
+
+    def find_slot(self, corridor_id: int, sku: str) -> int | None:
+        sku_id = self.sku_ids.get(sku)
+        if sku_id is None:
+            return None
+        return self.slot_index.get(sku_id * len(self.corridor_keys) + corridor_id)
+
+    def add_slot(self, corridor_id: int, sku: str) -> int:
+        """Create an empty slot for a pair that was not in the stock layout (rebuilds the index)."""
+        if sku not in self.sku_ids:
+            self.sku_ids[sku] = len(self.skus)
+            self.skus.append(sku)
+        sku_id = self.sku_ids[sku]
+        position = int(np.searchsorted(self.slot_skus, sku_id, side="right"))
+        self.slot_skus = np.insert(self.slot_skus, position, sku_id)
+        self.slot_corridors = np.insert(self.slot_corridors, position, corridor_id)
+        self.stock = np.insert(self.stock, position, 0)
+        self.index_slots()
+        return self.find_slot(corridor_id, sku)
+
+    def sku_slots(self, sku: str) -> slice:
+        sku_id = self.sku_ids.get(sku)
+        if sku_id is None:
+            return slice(0, 0)
+        return slice(int(self.sku_indptr[sku_id]), int(self.sku_indptr[sku_id + 1]))
+
+    def remaining(self, sku: str) -> int:
+        sku_id = self.sku_ids.get(sku)
+        return 0 if sku_id is None else int(self.sku_remaining[sku_id])
+
+    def stocked_slots(self, sku: str) -> np.ndarray:
+        """Slots still holding the SKU, in corridor position order."""
+        sku_id = self.sku_ids.get(sku)
+        if sku_id is None or self.sku_remaining[sku_id] == 0:
+            return np.empty(0, dtype=np.int64)
+        start, stop = self.sku_indptr[sku_id:sku_id + 2].tolist()
+        return (self.stock[start:stop] > 0).nonzero()[0] + start
+
+    def best_fit(self, sku: str, quantity: int) -> int | None:
+        """Slot with the least stock that still serves the whole quantity, else the fullest one."""
+        slots = self.stocked_slots(sku)
+        if not len(slots):
+            return None
+        stock = self.stock[slots]
+        serving = stock >= quantity
+        if serving.any():
+            return int(slots[serving][np.argmin(stock[serving])])
+        return int(slots[np.argmax(stock)])
+
+    def corridors_with_stock(self, sku: str) -> List[str]:
+        """Corridor keys still holding the SKU, in corridor position order."""
+        return [self.corridor_keys[corridor_id] for corridor_id in self.slot_corridors[self.stocked_slots(sku)].tolist()]
+
+    def corridor_stock(self, corridor_id: int) -> Dict[str, int]:
+        slots = np.flatnonzero((self.slot_corridors == corridor_id) & (self.stock > 0))
+        return {self.skus[self.slot_skus[slot]]: int(self.stock[slot]) for slot in slots}
+
+    def take(self, slot: int, quantity: int) -> int:
+        """Take up to quantity from one slot, returning what could not be served."""
+        taken = min(int(self.stock[slot]), quantity)
+        self.stock[slot] -= taken
+        self.sku_remaining[self.slot_skus[slot]] -= taken
+        return quantity - taken
+
+    def put(self, slot: int, quantity: int) -> None:
+        self.stock[slot] += quantity
+        self.sku_remaining[self.slot_skus[slot]] += quantity
+
+    def consume(self, slots: np.ndarray, quantities: np.ndarray) -> np.ndarray:
+        """Take up to quantities from distinct slots, returning what could not be served."""
+        taken = np.minimum(self.stock[slots], quantities)
+        self.stock[slots] -= taken
+        np.subtract.at(self.sku_remaining, self.slot_skus[slots], taken)
+        return quantities - taken
+
+    def refill(self, slots: np.ndarray, quantities: np.ndarray) -> None:
+        np.add.at(self.stock, slots, quantities)
+        np.add.at(self.sku_remaining, self.slot_skus[slots], quantities)
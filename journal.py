@@ -0,0 +1,27 @@
+from typing import Any, Callable, List, Tuple
+
+
+class Journal:
+    """Undo log of the mutations applied to a solution.
+
+    Every change to waves, boxes or stock records the call that reverts it. Rolling back
+    to a mark undoes a rejected move in O(changes); committing drops the entries once the
+    current state becomes the best one, so the log always leads back to the best solution.
+    """
+
+    def __init__(self):
+        self.entries: List[Tuple[Callable[..., Any], tuple]] = []
+
+    def record(self, undo: Callable[..., Any], *args) -> None:
+        self.entries.append((undo, args))
+
+    def mark(self) -> int:
+        return len(self.entries)
+
+    def rollback(self, mark: int = 0) -> None:
+        while len(self.entries) > mark:
+            undo, args = self.entries.pop()
+            undo(*args)
+
+    def commit(self) -> None:
+        self.entries.clear()
@@ -1,33 +1,16 @@
-from csv_reader import CSVReader
+from instance_cache import load_instance
 from simulated_annealing import SimulatedAnnealing
+from validation import SolutionValidator
 
 if __name__ == "__main__":
-    stock_layout = {
-        "floor": [],
-        "corridor": [],
-        "sku": [],
-        "pieces": []
-    }
-    product_boxes = {
-        "wave_id": [],
-        "box_id": [],
-        "box_pieces": [],
-        "wave_class": [],
-        "product_boxes_sku": []
-    }
-    stock_layout_file = CSVReader("stock_layout_1.csv")
-    stock_layout["floor"] = stock_layout_file.get_column_values("ANDAR")
-    stock_layout["corridor"] = stock_layout_file.get_column_values("CORREDOR")
-    stock_layout["sku"] = stock_layout_file.get_column_values("SKU")
-    stock_layout["pieces"] = stock_layout_file.get_column_values("PECAS")
+    instance = load_instance("stock_layout_1.csv", "product_boxes_1.csv")
 
-    product_boxes_file = CSVReader("product_boxes_1.csv")
-    product_boxes["box_id"] = product_boxes_file.get_column_values("CAIXA_ID")
-    product_boxes["box_pieces"] = product_boxes_file.get_column_values("PECAS")
-    product_boxes["wave_class"] = product_boxes_file.get_column_values("CLASSE_ONDA")
-    product_boxes["product_boxes_sku"] = product_boxes_file.get_column_values("SKU")
-
-    sa = SimulatedAnnealing(stock_layout, product_boxes)
+    sa = SimulatedAnnealing(instance.stock_layout, instance.product_boxes)
     sa.fill_boxes()
-    sa.fill_corridors()
-    sa.simulated_annealing()
\ No newline at end of file
+    sa.fill_corridors(instance.inventory())
+    sa.simulated_annealing()
+    print(f"Best cost: {sa.solution_cost}")
+    report = SolutionValidator.from_instance(instance, sa.config).validate_export(sa.export_solution())
+    print(f"Valid: {report.valid}, validated cost: {report.cost}")
+    for error in report.errors:
+        print(error)
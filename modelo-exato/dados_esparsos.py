@@ -0,0 +1,40 @@
+from collections import defaultdict
+
+import numpy as np
+import scipy.sparse as sp
+
+
+def indices_esparsos(I, data_Q, q_pi):
+    # o modelo so existe sobre os dados: triplas (p, k, a) com estoque de produtos demandados
+    # e pares (p, i) com demanda, nunca sobre os produtos cartesianos P x K x A ou P x I
+    I_to_index = {i: idx for idx, i in enumerate(I)}
+    produtos_demandados = sorted({p for (p, i), q in q_pi.items() if q > 0}, key=str)
+    Pd_to_index = {p: idx for idx, p in enumerate(produtos_demandados)}
+
+    triplas = [(p, k, a) for (p, k, a), q in data_Q.items() if q > 0 and p in Pd_to_index]
+    # pares (corredor, andar) que tem estoque de algum produto demandado
+    KA = sorted({(k, a) for (p, k, a) in triplas}, key=lambda ka: (str(ka[1]), str(ka[0])))
+    KA_to_index = {ka: idx for idx, ka in enumerate(KA)}
+
+    demanda = [(p, i, q) for (p, i), q in q_pi.items() if q > 0]
+    # S_E[p, s]: a tripla s guarda o produto p; S_D[p, i]: pecas do produto p na caixa i
+    S_E = sp.csr_matrix(
+        (np.ones(len(triplas)), ([Pd_to_index[p] for p, _, _ in triplas], np.arange(len(triplas)))),
+        shape=(len(produtos_demandados), len(triplas)),
+    )
+    S_D = sp.csr_matrix(
+        (
+            np.array([q for _, _, q in demanda], dtype=float),
+            ([Pd_to_index[p] for p, _, _ in demanda], [I_to_index[i] for _, i, _ in demanda]),
+        ),
+        shape=(len(produtos_demandados), len(I)),
+    )
+    pecas_caixa = np.asarray(S_D.sum(axis=0)).ravel()
+
+    ka_da_tripla = np.array([KA_to_index[k, a] for p, k, a in triplas], dtype=np.int64)
+    triplas_por_ka = defaultdict(list)
+    triplas_por_andar = defaultdict(list)
+    for s, (p, k, a) in enumerate(triplas):
+        triplas_por_ka[ka_da_tripla[s]].append(s)
+        triplas_por_andar[a].append(s)
+    return triplas, KA, ka_da_tripla, S_E, S_D, pecas_caixa, triplas_por_ka, triplas_por_andar
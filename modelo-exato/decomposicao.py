@@ -0,0 +1,126 @@
+import math
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from modelagem import Solucao
+from modelo_linear import constroi_modelo_linear
+
+# todas as classes otimas: otimo apenas para a divisao do estoque feita por aloca_estoque,
+# nao para o problema original
+OTIMA_DECOMPOSTA = "Optimal (decomposed)"
+# familias de variaveis da formulacao linear, devolvidas vazias quando nao ha caixas
+FAMILIAS = ("C_i", "Z_j", "x_ij", "t_kaj", "Z_aj", "A_aj", "E_pkaj", "G_ja", "L_ja")
+
+
+def aloca_estoque(data_Q, demanda_classe):
+    # divide o estoque de cada tripla (p, k, a) entre as classes que pedem o produto p.
+    # Cada classe, da maior demanda para a menor, retira o que precisa das triplas com mais
+    # estoque restante (menos corredores por classe); a sobra de cada tripla fica com a classe
+    # que ja retira dela ou, se ninguem retira, com a classe de maior demanda do produto,
+    # para que os subproblemas ainda possam escolher entre corredores
+    triplas_produto = defaultdict(list)
+    for (p, k, a), q in data_Q.items():
+        if q > 0:
+            triplas_produto[p].append((k, a))
+
+    estoque_classe = defaultdict(dict)
+    for p, demandas in demanda_classe.items():
+        restante = {(k, a): data_Q[p, k, a] for k, a in triplas_produto[p]}
+        if sum(demandas.values()) > sum(restante.values()):
+            raise ValueError(f"Estoque insuficiente para o produto {p}")
+        dono = {}
+        classes = sorted(demandas, key=demandas.get, reverse=True)
+        for c in classes:
+            falta = demandas[c]
+            for k, a in sorted(restante, key=restante.get, reverse=True):
+                if falta <= 0:
+                    break
+                retirada = min(falta, restante[k, a])
+                if retirada <= 0:
+                    continue
+                restante[k, a] -= retirada
+                falta -= retirada
+                estoque_classe[c][p, k, a] = estoque_classe[c].get((p, k, a), 0) + retirada
+                dono.setdefault((k, a), c)
+        for (k, a), sobra in restante.items():
+            if sobra > 0:
+                c = dono.get((k, a), classes[0])
+                estoque_classe[c][p, k, a] = estoque_classe[c].get((p, k, a), 0) + sobra
+    return estoque_classe
+
+
+def resolve_classe(classe, K, A, I, J, data_Q, q_pi, solver, parametros):
+    modelo, KA = constroi_modelo_linear(K, A, I, J, [classe], data_Q, q_pi)
+    solucao = modelo.resolve(solver, parametros)
+    valores = None
+    if solucao.valores is not None:
+        valores = {nome: modelo.valores(nome, solucao) for nome in modelo.familias}
+    # os valores das colunas ja estao nos dicionarios; o vetor nao precisa voltar ao processo pai
+    solucao.valores = None
+    return classe, solucao, valores, KA
+
+
+def resolve_decomposto(K, A, I, C, data_Q, q_pi, classe_caixa, capacidade_onda=6000, ondas_extras=1, solver="highs", parametros=None, processos=None):
+    # uma caixa so pode ir para uma onda da sua classe, entao o problema se separa por classe
+    # depois que o estoque compartilhado e dividido (aloca_estoque). Cada classe recebe
+    # ceil(pecas / capacidade_onda) + ondas_extras ondas, e os subproblemas (formulacao linear)
+    # sao resolvidos em paralelo. A funcao objetivo e separavel por onda, entao o objetivo e a
+    # soma dos das classes. A divisao do estoque restringe o problema: a soma dos limites das
+    # classes nao limita o problema original, entao a solucao volta sem limite e nunca como otima
+    # (com todas as classes otimas, o status e OTIMA_DECOMPOSTA)
+    caixas_classe = defaultdict(list)
+    for i in I:
+        caixas_classe[classe_caixa[i]].append(i)
+    demanda_classe = defaultdict(lambda: defaultdict(int))
+    q_pi_classe = defaultdict(dict)
+    for (p, i), q in q_pi.items():
+        if q > 0:
+            c = classe_caixa[i]
+            demanda_classe[p][c] += q
+            q_pi_classe[c][p, i] = q
+    estoque_classe = aloca_estoque(data_Q, demanda_classe)
+
+    ondas_classe, proxima_onda = {}, 1
+    for c in C:
+        if not caixas_classe[c]:
+            continue
+        n_ondas = math.ceil(sum(q_pi_classe[c].values()) / capacidade_onda) + ondas_extras
+        ondas_classe[c] = list(range(proxima_onda, proxima_onda + n_ondas))
+        proxima_onda += n_ondas
+
+    if not ondas_classe:
+        # nenhuma classe com caixas: nada a resolver (e o executor nao aceita zero processos)
+        return Solucao(status=OTIMA_DECOMPOSTA, objetivo=0.0), {nome: {} for nome in FAMILIAS}, [], []
+
+    C_to_index = {c: idx + 1 for idx, c in enumerate(C)}
+    valores = defaultdict(dict)
+    KA = set()
+    solucao = Solucao(status="", objetivo=0.0)
+    classes_otimas = True
+    with ProcessPoolExecutor(max_workers=processos or min(len(ondas_classe), os.cpu_count())) as executor:
+        tarefas = [
+            executor.submit(
+                resolve_classe, c, K, A, caixas_classe[c], ondas_classe[c],
+                estoque_classe[c], q_pi_classe[c], solver, parametros,
+            )
+            for c in ondas_classe
+        ]
+        for tarefa in tarefas:
+            c, solucao_classe, valores_classe, KA_classe = tarefa.result()
+            print(f"Classe {c}: {solucao_classe.status}, objetivo {solucao_classe.objetivo}, {solucao_classe.segundos:.2f}s")
+            solucao.segundos = max(solucao.segundos, solucao_classe.segundos)
+            classes_otimas = classes_otimas and solucao_classe.otima
+            if valores_classe is None or solucao.objetivo is None:
+                solucao.objetivo = None
+                continue
+            solucao.objetivo += solucao_classe.objetivo
+            KA.update(KA_classe)
+            # no subproblema a unica classe tem indice 1: volta para o indice global
+            for nome, valores_familia in valores_classe.items():
+                if nome in ("C_i", "Z_j"):
+                    valores_familia = dict.fromkeys(valores_familia, C_to_index[c])
+                valores[nome].update(valores_familia)
+    solucao.status = OTIMA_DECOMPOSTA if classes_otimas else "Not optimal"
+    J = [j for ondas in ondas_classe.values() for j in ondas]
+    return solucao, dict(valores), J, sorted(KA, key=lambda ka: (str(ka[1]), str(ka[0])))
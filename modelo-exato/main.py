@@ -1,17 +1,28 @@
+import argparse
+
 from csv_reader import CSVReader
+from partida_heuristica import executa_sa
 from test_gurobi import resolve_modelo
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resolve o modelo exato de ondas.")
+    parser.add_argument("formulacao", nargs="?", default="indicadores", choices=["indicadores", "linear", "decomposta"])
+    parser.add_argument("--solver", default="gurobi", choices=["gurobi", "highs", "mps"])
+    parser.add_argument("--mps", default="modelo.mps", help="arquivo escrito com --solver mps")
+    parser.add_argument("--sa", action="store_true", help="usa a solucao do simulated annealing como partida")
+    args = parser.parse_args()
+
     stock_layout_file = CSVReader("stock_layout_1.csv")
     sku_stock = stock_layout_file.get_column_values("SKU")
     corredor_stock = stock_layout_file.get_column_values("CORREDOR")
     andar_stock = stock_layout_file.get_column_values("ANDAR")
     pecas_stock = stock_layout_file.get_column_values("PECAS")
 
-    data_q = {
-        (sku, corredor, andar): pecas
-        for sku, corredor, andar, pecas in zip(sku_stock, corredor_stock, andar_stock, pecas_stock)
-    }
+    # apenas as triplas (sku, corredor, andar) com estoque
+    data_q = {}
+    for sku, corredor, andar, pecas in zip(sku_stock, corredor_stock, andar_stock, pecas_stock):
+        if pecas > 0:
+            data_q[sku, corredor, andar] = data_q.get((sku, corredor, andar), 0) + pecas
 
     product_boxes_file = CSVReader("product_boxes_1.csv")
     sku_boxes = product_boxes_file.get_column_values("SKU")
@@ -27,15 +38,18 @@ if __name__ == "__main__":
     J = list(set(onda_boxes))
     C = list(set(classe_onda_boxes))
 
-    q_pi_input = {
-        (sku, caixa_id): pecas
-        for sku, caixa_id, pecas in zip(sku_boxes, caixa_id_boxes, pecas_boxes)
-    }
-    all_PI_combs = {(p, i) for p in P for i in I}
-    diff_combs = all_PI_combs.difference(set(q_pi_input.keys()))
-
-    additional_data_q_pi = {(p, i): 0 for (p, i) in list(diff_combs)}
-    q_pi_input.update(additional_data_q_pi)
-
-    resolve_modelo(P, K, A, I, J, C, data_q, q_pi_input)
+    # apenas os pares (sku, caixa) com demanda: o modelo e construido sobre eles
+    q_pi_input = {}
+    for sku, caixa_id, pecas in zip(sku_boxes, caixa_id_boxes, pecas_boxes):
+        q_pi_input[sku, caixa_id] = q_pi_input.get((sku, caixa_id), 0) + pecas
+
+    solucao_inicial = None
+    if args.sa:
+        solucao_inicial, custo_sa = executa_sa("stock_layout_1.csv", "product_boxes_1.csv")
+        print(f"Custo do SA: {custo_sa}")
+    classe_caixa = dict(zip(caixa_id_boxes, classe_onda_boxes))
+    resolve_modelo(
+        P, K, A, I, J, C, data_q, q_pi_input, args.formulacao,
+        solucao_inicial=solucao_inicial, solver=args.solver, caminho_mps=args.mps, classe_caixa=classe_caixa,
+    )
 
@@ -0,0 +1,266 @@
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import scipy.sparse as sp
+
+# camada de modelagem independente do solver: variaveis sao colunas (indices inteiros), restricoes
+# sao blocos esparsos (linha, coluna, coeficiente) com limites por linha, lb <= A x <= ub. O mesmo
+# modelo e enviado ao Gurobi, ao HiGHS ou escrito num arquivo MPS para qualquer outro solver.
+
+INF = np.inf
+
+
+@dataclass
+class Solucao:
+    status: str
+    objetivo: float = None
+    limite: float = None  # melhor limite inferior provado (minimizacao)
+    valores: np.ndarray = None
+    segundos: float = 0.0
+    otima: bool = False
+
+
+@dataclass
+class Modelo:
+    nome: str = "modelo"
+    lb: list = field(default_factory=list)
+    ub: list = field(default_factory=list)
+    inteira: list = field(default_factory=list)
+    custo: list = field(default_factory=list)
+    familias: dict = field(default_factory=dict)
+    blocos: list = field(default_factory=list)
+    inicio: dict = field(default_factory=dict)
+    n: int = 0
+    m: int = 0
+
+    def adiciona_variaveis(self, nome, chaves, lb=0.0, ub=INF, inteira=False, custo=0.0) -> np.ndarray:
+        # cria uma coluna por chave e devolve os indices, na ordem das chaves
+        chaves = list(chaves)
+        indices = np.arange(self.n, self.n + len(chaves))
+        self.n += len(chaves)
+        self.lb.append(np.broadcast_to(np.asarray(lb, dtype=float), len(chaves)))
+        self.ub.append(np.broadcast_to(np.asarray(ub, dtype=float), len(chaves)).copy())
+        self.inteira.append(np.full(len(chaves), inteira))
+        self.custo.append(np.broadcast_to(np.asarray(custo, dtype=float), len(chaves)))
+        self.familias[nome] = (chaves, indices)
+        return indices
+
+    def fixa_limite_superior(self, colunas, valor) -> None:
+        ub = np.concatenate(self.ub)
+        ub[np.asarray(colunas, dtype=np.int64)] = valor
+        self.ub = [ub]
+
+    def adiciona_restricoes(self, nome, linhas, colunas, coeficientes, lb=-INF, ub=INF) -> None:
+        # linhas locais ao bloco (0..m_bloco-1); lb e ub sao escalares ou um valor por linha
+        linhas = np.asarray(linhas, dtype=np.int64).ravel()
+        m_bloco = int(linhas.max()) + 1 if len(linhas) else 0
+        if np.ndim(lb):
+            m_bloco = max(m_bloco, len(lb))
+        if np.ndim(ub):
+            m_bloco = max(m_bloco, len(ub))
+        self.blocos.append((
+            nome,
+            linhas + self.m,
+            np.asarray(colunas, dtype=np.int64).ravel(),
+            np.broadcast_to(np.asarray(coeficientes, dtype=float), linhas.shape).ravel(),
+            np.broadcast_to(np.asarray(lb, dtype=float), m_bloco),
+            np.broadcast_to(np.asarray(ub, dtype=float), m_bloco),
+        ))
+        self.m += m_bloco
+
+    def define_inicio(self, nome, valores) -> None:
+        # valores de partida {chave: valor} de uma familia de variaveis
+        chaves, indices = self.familias[nome]
+        posicao = dict(zip(chaves, indices.tolist()))
+        for chave, valor in valores.items():
+            if chave in posicao:
+                self.inicio[posicao[chave]] = valor
+
+    def matriz(self):
+        linhas = np.concatenate([bloco[1] for bloco in self.blocos])
+        colunas = np.concatenate([bloco[2] for bloco in self.blocos])
+        coeficientes = np.concatenate([bloco[3] for bloco in self.blocos])
+        A = sp.csr_matrix((coeficientes, (linhas, colunas)), shape=(self.m, self.n))
+        A.sum_duplicates()
+        return (
+            A,
+            np.concatenate([bloco[4] for bloco in self.blocos]),
+            np.concatenate([bloco[5] for bloco in self.blocos]),
+        )
+
+    def colunas(self):
+        return np.concatenate(self.lb), np.concatenate(self.ub), np.concatenate(self.inteira), np.concatenate(self.custo)
+
+    def valores(self, nome, solucao: Solucao) -> dict:
+        chaves, indices = self.familias[nome]
+        return dict(zip(chaves, solucao.valores[indices].tolist()))
+
+    def resolve(self, solver="gurobi", parametros=None, caminho_mps=None) -> Solucao:
+        if solver == "gurobi":
+            return resolve_gurobi(self, parametros or {})
+        if solver == "highs":
+            return resolve_highs(self, parametros or {})
+        if solver == "mps":
+            escreve_mps(self, caminho_mps or f"{self.nome}.mps")
+            return Solucao(status="escrito")
+        raise ValueError(f"Solver desconhecido: {solver}")
+
+
+def resolve_gurobi(modelo: Modelo, parametros) -> Solucao:
+    import gurobipy as gp
+    from gurobipy import GRB
+
+    A, rlb, rub = modelo.matriz()
+    lb, ub, inteira, custo = modelo.colunas()
+    model = gp.Model(modelo.nome)
+    for parametro, valor in parametros.items():
+        model.setParam(parametro, valor)
+    vtype = np.where(inteira, np.where((lb >= 0) & (ub <= 1), GRB.BINARY, GRB.INTEGER), GRB.CONTINUOUS)
+    x = model.addMVar(modelo.n, lb=lb, ub=np.where(np.isinf(ub), GRB.INFINITY, ub), vtype=vtype, obj=custo)
+    igual = rlb == rub
+    for linhas, sentido, rhs in (
+            (np.flatnonzero(igual), GRB.EQUAL, rub),
+            (np.flatnonzero(~igual & np.isfinite(rub)), GRB.LESS_EQUAL, rub),
+            (np.flatnonzero(~igual & np.isfinite(rlb)), GRB.GREATER_EQUAL, rlb),
+    ):
+        if len(linhas):
+            model.addMConstr(A[linhas], x, sentido, rhs[linhas])
+    model.ModelSense = GRB.MINIMIZE
+    if modelo.inicio:
+        inicio = np.full(modelo.n, GRB.UNDEFINED)
+        inicio[list(modelo.inicio)] = list(modelo.inicio.values())
+        x.Start = inicio
+
+    inicio_resolucao = time.perf_counter()
+    model.optimize()
+    solucao = Solucao(
+        status=str(model.Status),
+        segundos=time.perf_counter() - inicio_resolucao,
+        otima=model.Status == GRB.OPTIMAL,
+    )
+    if model.SolCount > 0:
+        solucao.objetivo = model.ObjVal
+        solucao.valores = np.asarray(x.X)
+    solucao.limite = limite_gurobi(model, solucao.objetivo)
+    return solucao
+
+
+def limite_gurobi(model, objetivo=None):
+    # limite inferior de um modelo ja otimizado, ou None quando o Gurobi nao tem um (inviavel, sem
+    # incumbente...): ler ObjBound nesses casos levanta GurobiError
+    from gurobipy import GRB, GurobiError
+
+    if model.Status not in (GRB.OPTIMAL, GRB.TIME_LIMIT, GRB.INTERRUPTED, GRB.SUBOPTIMAL):
+        return None
+    if not model.IsMIP:
+        return objetivo
+    try:
+        return model.ObjBound
+    except GurobiError:
+        return None
+
+
+def resolve_highs(modelo: Modelo, parametros) -> Solucao:
+    import highspy
+
+    A, rlb, rub = modelo.matriz()
+    A = A.tocsc()
+    lb, ub, inteira, custo = modelo.colunas()
+    h = highspy.Highs()
+    for parametro, valor in parametros.items():
+        h.setOptionValue(parametro, valor)
+
+    lp = highspy.HighsLp()
+    lp.num_col_ = modelo.n
+    lp.num_row_ = modelo.m
+    lp.col_cost_ = custo
+    lp.col_lower_ = np.where(np.isinf(lb), -highspy.kHighsInf, lb)
+    lp.col_upper_ = np.where(np.isinf(ub), highspy.kHighsInf, ub)
+    lp.row_lower_ = np.where(np.isinf(rlb), -highspy.kHighsInf, rlb)
+    lp.row_upper_ = np.where(np.isinf(rub), highspy.kHighsInf, rub)
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+    lp.a_matrix_.num_col_ = modelo.n
+    lp.a_matrix_.num_row_ = modelo.m
+    lp.a_matrix_.start_ = A.indptr
+    lp.a_matrix_.index_ = A.indices
+    lp.a_matrix_.value_ = A.data
+    lp.integrality_ = [highspy.HighsVarType.kInteger if i else highspy.HighsVarType.kContinuous for i in inteira]
+    h.passModel(lp)
+    # o HiGHS so aceita uma partida com todas as colunas definidas
+    if len(modelo.inicio) == modelo.n:
+        inicio = highspy.HighsSolution()
+        inicio.col_value = [modelo.inicio[coluna] for coluna in range(modelo.n)]
+        inicio.value_valid = True
+        h.setSolution(inicio)
+    elif modelo.inicio:
+        print(f"Aviso: partida parcial ({len(modelo.inicio)} de {modelo.n} colunas) ignorada pelo HiGHS")
+
+    inicio_resolucao = time.perf_counter()
+    h.run()
+    status = h.getModelStatus()
+    info = h.getInfo()
+    solucao = Solucao(
+        status=h.modelStatusToString(status),
+        segundos=time.perf_counter() - inicio_resolucao,
+        otima=status == highspy.HighsModelStatus.kOptimal,
+    )
+    if info.primal_solution_status == highspy.SolutionStatus.kSolutionStatusFeasible:
+        solucao.objetivo = info.objective_function_value
+        solucao.valores = np.asarray(h.getSolution().col_value)
+    if not inteira.any():
+        solucao.limite = solucao.objetivo
+    elif np.isfinite(info.mip_dual_bound):
+        # sem limite (ex.: inviavel) o HiGHS devolve -inf
+        solucao.limite = info.mip_dual_bound
+    return solucao
+
+
+def escreve_mps(modelo: Modelo, caminho) -> None:
+    # MPS livre com nomes genericos (C<coluna>, R<linha>); linhas com os dois limites vao em RANGES
+    A, rlb, rub = modelo.matriz()
+    A = A.tocsc()
+    lb, ub, inteira, custo = modelo.colunas()
+    igual = rlb == rub
+    with open(caminho, "w") as arquivo:
+        arquivo.write(f"NAME {modelo.nome}\nROWS\n N  OBJ\n")
+        tipos = np.where(igual, "E", np.where(np.isfinite(rub), "L", np.where(np.isfinite(rlb), "G", "N")))
+        for linha, tipo in enumerate(tipos):
+            arquivo.write(f" {tipo}  R{linha}\n")
+
+        arquivo.write("COLUMNS\n")
+        em_inteiras = False
+        for coluna in range(modelo.n):
+            if inteira[coluna] != em_inteiras:
+                marcador = "INTORG" if inteira[coluna] else "INTEND"
+                arquivo.write(f"    MARKER  'MARKER'  '{marcador}'\n")
+                em_inteiras = bool(inteira[coluna])
+            if custo[coluna]:
+                arquivo.write(f"    C{coluna}  OBJ  {custo[coluna]:.17g}\n")
+            for posicao in range(A.indptr[coluna], A.indptr[coluna + 1]):
+                arquivo.write(f"    C{coluna}  R{A.indices[posicao]}  {A.data[posicao]:.17g}\n")
+        if em_inteiras:
+            arquivo.write("    MARKER  'MARKER'  'INTEND'\n")
+
+        arquivo.write("RHS\n")
+        rhs = np.where(tipos == "G", rlb, rub)
+        for linha in np.flatnonzero((tipos != "N") & (rhs != 0)):
+            arquivo.write(f"    RHS  R{linha}  {rhs[linha]:.17g}\n")
+        faixas = np.flatnonzero(~igual & np.isfinite(rlb) & np.isfinite(rub))
+        if len(faixas):
+            arquivo.write("RANGES\n")
+            for linha in faixas:
+                arquivo.write(f"    RNG  R{linha}  {rub[linha] - rlb[linha]:.17g}\n")
+
+        # limites explicitos para as inteiras: alguns leitores assumem inteiras binarias sem BOUNDS
+        arquivo.write("BOUNDS\n")
+        for coluna in range(modelo.n):
+            if np.isinf(lb[coluna]):
+                arquivo.write(f" MI BND  C{coluna}\n")
+            elif lb[coluna] != 0 or inteira[coluna]:
+                arquivo.write(f" LO BND  C{coluna}  {lb[coluna]:.17g}\n")
+            if np.isfinite(ub[coluna]):
+                arquivo.write(f" UP BND  C{coluna}  {ub[coluna]:.17g}\n")
+            elif inteira[coluna]:
+                arquivo.write(f" PL BND  C{coluna}\n")
+        arquivo.write("ENDATA\n")
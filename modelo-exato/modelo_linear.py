@@ -0,0 +1,125 @@
+import itertools
+
+import numpy as np
+
+from dados_esparsos import indices_esparsos
+from modelagem import INF, Modelo
+
+
+def linhas_por_onda(linhas, nJ):
+    # uma linha por (linha base, onda): linhas[:, None] * nJ + j
+    return np.asarray(linhas)[:, None] * nJ + np.arange(nJ)
+
+
+def constroi_modelo_linear(K, A, I, J, C, data_Q, q_pi, P1=1, classe_caixa=None):
+    # formulacao linear (big-M com limites dos dados e quebra de simetria das ondas) na camada de
+    # modelagem; todas as familias de restricoes sao montadas em lote com indices NumPy.
+    # Com classe_caixa ({caixa: classe}), C_i fica fixo na classe de cada caixa
+    triplas, KA, ka_da_tripla, S_E, S_D, pecas_caixa, _, _ = indices_esparsos(I, data_Q, q_pi)
+    nI, nJ, nT, nKA, nA = len(I), len(J), len(triplas), len(KA), len(A)
+    corridor_indices = {k: idx + 1 for idx, k in enumerate(K)}
+    A_to_index = {a: idx for idx, a in enumerate(A)}
+    andar_ka = np.array([A_to_index[a] for k, a in KA], dtype=np.int64)
+    indice_ka = np.array([corridor_indices[k] for k, a in KA], dtype=float)
+    # maior indice de corredor com estoque em cada andar
+    U_a = np.zeros(nA)
+    np.maximum.at(U_a, andar_ka, indice_ka)
+    Q_s = np.array([data_Q[tripla] for tripla in triplas], dtype=float)
+    # o maximo que pode ser retirado de uma tripla: seu estoque ou a demanda total do produto
+    U_s = np.minimum(Q_s, S_E.T @ np.asarray(S_D.sum(axis=1)).ravel())
+
+    modelo = Modelo("rpvmm")
+    if classe_caixa is None:
+        C_i = modelo.adiciona_variaveis("C_i", I, 1, len(C), inteira=True)
+    else:
+        classe_i = np.array([C.index(classe_caixa[i]) + 1 for i in I], dtype=float)
+        C_i = modelo.adiciona_variaveis("C_i", I, classe_i, classe_i, inteira=True)
+    Z_j = modelo.adiciona_variaveis("Z_j", J, 1, len(C), inteira=True)
+    x = modelo.adiciona_variaveis("x_ij", itertools.product(I, J), 0, 1, inteira=True).reshape(nI, nJ)
+    t = modelo.adiciona_variaveis(
+        "t_kaj", ((k, a, j) for k, a in KA for j in J), 0, 1, inteira=True, custo=1
+    ).reshape(nKA, nJ)
+    Z_aj = modelo.adiciona_variaveis("Z_aj", itertools.product(A, J), 0, 1, inteira=True).reshape(nA, nJ)
+    A_aj = modelo.adiciona_variaveis("A_aj", itertools.product(A, J), 0, 1, inteira=True, custo=P1).reshape(nA, nJ)
+    E = modelo.adiciona_variaveis(
+        "E_pkaj", ((p, k, a, j) for p, k, a in triplas for j in J), 0, INF, inteira=True
+    ).reshape(nT, nJ)
+    G_ja = modelo.adiciona_variaveis("G_ja", itertools.product(J, A), 0, len(K), inteira=True, custo=1).reshape(nJ, nA)
+    L_ja = modelo.adiciona_variaveis("L_ja", itertools.product(J, A), 0, len(K), inteira=True, custo=-1).reshape(nJ, nA)
+
+    def bloco(nome, termos, lb=-INF, ub=INF):
+        # termos: (linhas, colunas, coeficientes) com formatos compativeis por broadcast
+        linhas, colunas, coeficientes = zip(*(np.broadcast_arrays(*termo) for termo in termos))
+        modelo.adiciona_restricoes(
+            nome,
+            np.concatenate([l.ravel() for l in linhas]),
+            np.concatenate([c.ravel() for c in colunas]),
+            np.concatenate([v.ravel() for v in coeficientes]).astype(float),
+            lb, ub,
+        )
+
+    ondas = np.arange(nJ)
+    # Capacity of waves
+    bloco("wave_capacity", [(ondas[None, :], x, pecas_caixa[:, None])], ub=np.full(nJ, 6000.0))
+    # Each box is assigned to exactly one wave
+    bloco("single_allocation", [(np.arange(nI)[:, None], x, 1)], lb=np.ones(nI), ub=np.ones(nI))
+
+    # x_ij = 1 -> C_i = Z_j, com M = |C| - 1
+    M_classe = len(C) - 1
+    pares = np.arange(nI * nJ).reshape(nI, nJ)
+    bloco("class_match_upper", [(pares, C_i[:, None], 1), (pares, Z_j[None, :], -1), (pares, x, M_classe)], ub=np.full(nI * nJ, float(M_classe)))
+    bloco("class_match_lower", [(pares, C_i[:, None], -1), (pares, Z_j[None, :], 1), (pares, x, M_classe)], ub=np.full(nI * nJ, float(M_classe)))
+
+    # quebra de simetria: as ondas sao intercambiaveis, entao basta que a caixa de
+    # posicao i_idx possa ir apenas para as ondas de posicao <= i_idx
+    modelo.fixa_limite_superior(x[ondas[None, :] > np.arange(nI)[:, None]], 0)
+
+    # Sum of E_pkaj = Sum of q_pi * x_ij, uma linha por (produto demandado, onda)
+    S_E, S_D = S_E.tocoo(), S_D.tocoo()
+    n_balanco = S_E.shape[0] * nJ
+    bloco("picking_balance", [
+        (linhas_por_onda(S_E.row, nJ), E[S_E.col], S_E.data[:, None]),
+        (linhas_por_onda(S_D.row, nJ), x[S_D.col], -S_D.data[:, None]),
+    ], lb=np.zeros(n_balanco), ub=np.zeros(n_balanco))
+    bloco("max_picking_capacity", [(np.arange(nT)[:, None], E, 1)], ub=Q_s)
+
+    # E_pkaj > 0 forca t_kaj = 1 (por tripla, mais justo que o big-M agregado no corredor)
+    bloco("t_kaj_upper", [
+        (linhas_por_onda(np.arange(nT), nJ), E, 1),
+        (linhas_por_onda(np.arange(nT), nJ), t[ka_da_tripla], -U_s[:, None]),
+    ], ub=np.zeros(nT * nJ))
+    # t_kaj = 1 exige ao menos uma peca retirada no corredor
+    bloco("t_kaj_lower", [
+        (linhas_por_onda(np.arange(nKA), nJ), t, 1),
+        (linhas_por_onda(ka_da_tripla, nJ), E, -1),
+    ], ub=np.zeros(nKA * nJ))
+
+    linhas_ka = linhas_por_onda(np.arange(nKA), nJ)
+    bloco("Z_aj_lower", [(linhas_ka, t, 1), (linhas_ka, Z_aj[andar_ka], -1)], ub=np.zeros(nKA * nJ))
+    bloco("Z_aj_upper", [
+        (linhas_por_onda(np.arange(nA), nJ), Z_aj, 1),
+        (linhas_por_onda(andar_ka, nJ), t, -1),
+    ], ub=np.zeros(nA * nJ))
+    linhas_aj = linhas_por_onda(np.arange(nA), nJ)
+    bloco("A_aj", [(linhas_aj, A_aj, 1), (linhas_aj, Z_aj, -1)], lb=np.zeros(nA * nJ), ub=np.zeros(nA * nJ))
+
+    # G_ja >= indice do corredor usado; L_ja <= indice do corredor usado (U_a se nao usado)
+    bloco("G_ja_lower", [(linhas_ka, t, indice_ka[:, None]), (linhas_ka, G_ja.T[andar_ka], -1)], ub=np.zeros(nKA * nJ))
+    bloco("L_ja_upper", [
+        (linhas_ka, L_ja.T[andar_ka], 1),
+        (linhas_ka, t, (U_a[andar_ka] - indice_ka)[:, None]),
+    ], ub=np.repeat(U_a[andar_ka], nJ))
+    # sem corredores no andar, G_ja = L_ja = 0
+    linhas_ja = np.arange(nJ * nA).reshape(nJ, nA)
+    bloco("G_ja_upper", [(linhas_ja, G_ja, 1), (linhas_ja, Z_aj.T, -U_a[None, :])], ub=np.zeros(nJ * nA))
+    bloco("L_ja_G_ja", [(linhas_ja, L_ja, 1), (linhas_ja, G_ja, -1)], ub=np.zeros(nJ * nA))
+    return modelo, KA
+
+
+def define_solucao_inicial(modelo, valores, completa):
+    # valores de partida (MIP start); numa partida completa as variaveis sem valor comecam em zero
+    for nome, (chaves, indices) in modelo.familias.items():
+        valores_familia = valores.get(nome, {})
+        if completa and nome not in ("C_i", "Z_j"):
+            valores_familia = {**dict.fromkeys(chaves, 0), **valores_familia}
+        modelo.define_inicio(nome, valores_familia)
@@ -0,0 +1,78 @@
+import os
+import random
+import sys
+from collections import defaultdict
+
+# o simulated annealing fica na raiz do repositorio
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def executa_sa(stock_layout_file, product_boxes_file, seed=0, config=None):
+    # roda o simulated annealing e devolve a melhor solucao exportada e o seu custo
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+    from instance_cache import load_instance
+    from simulated_annealing import Config, SimulatedAnnealing
+
+    random.seed(seed)
+    instance = load_instance(stock_layout_file, product_boxes_file)
+    sa = SimulatedAnnealing(instance.stock_layout, instance.product_boxes, config or Config(verbose=False))
+    sa.fill_boxes()
+    sa.fill_corridors(instance.inventory())
+    sa.simulated_annealing()
+    return sa.export_solution(), sa.solution_cost
+
+
+def valores_iniciais(solucao, I, J, C_to_index, corridor_indices, P1=1):
+    # converte as ondas do SA ({onda: {"wave_class", "corridors": {"corredor_andar": {caixa: {sku: pecas}}}}})
+    # em valores de partida para as variaveis do modelo. As ondas do SA ocupam as ondas de J na ordem
+    # da primeira caixa de cada uma em I (o que respeita a quebra de simetria da formulacao linear);
+    # se o SA usar mais ondas que J, as caixas que sobrarem ficam sem valor (partida parcial)
+    posicao = {i: idx for idx, i in enumerate(I)}
+    primeira_caixa = {
+        onda: min((posicao[caixa] for caixas in dados["corridors"].values() for caixa in caixas), default=len(I))
+        for onda, dados in solucao.items()
+    }
+    ondas = dict(zip(sorted(solucao, key=primeira_caixa.get), J))
+    valores = defaultdict(dict)
+    caixas_alocadas = {}
+    retiradas = defaultdict(float)
+    for onda_sa, j in ondas.items():
+        classe = C_to_index[solucao[onda_sa]["wave_class"]]
+        valores["Z_j"][j] = classe
+        for chave_corredor, caixas in solucao[onda_sa]["corridors"].items():
+            corredor, andar = (int(parte) for parte in chave_corredor.split("_"))
+            for caixa, produtos in caixas.items():
+                caixas_alocadas[caixa] = j
+                valores["C_i"][caixa] = classe
+                for sku, pecas in produtos.items():
+                    retiradas[sku, corredor, andar, j] += pecas
+
+    completa = len(caixas_alocadas) == len(I)
+    if completa:
+        # ondas de J que o SA nao usou: sem caixas (x_ij = 0) qualquer classe satisfaz class_match
+        for j in J:
+            valores["Z_j"].setdefault(j, 1)
+    for i, j_caixa in caixas_alocadas.items():
+        for j in J:
+            if completa or j == j_caixa:
+                valores["x_ij"][i, j] = int(j == j_caixa)
+    valores["E_pkaj"] = dict(retiradas)
+
+    corredores = defaultdict(set)
+    for (sku, corredor, andar, j), pecas in retiradas.items():
+        if pecas > 0:
+            corredores[andar, j].add(corredor)
+    for (andar, j), usados in corredores.items():
+        for corredor in usados:
+            valores["t_kaj"][corredor, andar, j] = 1
+        indices = [corridor_indices[corredor] for corredor in usados]
+        valores["Z_aj"][andar, j] = valores["A_aj"][andar, j] = 1
+        valores["G_ja"][j, andar] = max(indices)
+        valores["L_ja"][j, andar] = min(indices)
+
+    objetivo = (
+        sum(valores["G_ja"].values()) - sum(valores["L_ja"].values())
+        + P1 * sum(valores["A_aj"].values()) + sum(valores["t_kaj"].values())
+    )
+    return dict(valores), objetivo, completa
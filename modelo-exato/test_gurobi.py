@@ -1,51 +1,67 @@
-import gurobipy as gp
-from gurobipy import GRB
-import itertools
-import random
-import sys
 import csv
+from collections import defaultdict
+
+import numpy as np
+
+from dados_esparsos import indices_esparsos
+from decomposicao import OTIMA_DECOMPOSTA, resolve_decomposto
+from modelagem import Solucao, limite_gurobi
+from modelo_linear import constroi_modelo_linear, define_solucao_inicial
+from partida_heuristica import valores_iniciais
 from validator import valida_resultado
 
-def resolve_modelo(P, K, A, I, J, C, data_Q, q_pi_input):
-    P1 = 1
+
+def aplica_solucao_inicial(variaveis, valores, completa):
+    # valores de partida (MIP start); numa partida completa as variaveis sem valor comecam em zero
+    for nome, variavel in variaveis.items():
+        valores_variavel = valores.get(nome, {})
+        for chave, var in variavel.items():
+            if chave in valores_variavel:
+                var.Start = valores_variavel[chave]
+            elif completa and nome not in ("C_i", "Z_j"):
+                var.Start = 0
+
+
+PARAMETROS_PADRAO = {"Heuristics": 0, "Presolve": 0, "NodefileStart": 0.25, "Threads": 1}
+
+
+def resolve_indicadores(K, A, I, J, C, data_Q, q_pi, parametros, partida, P1=1, classe_caixa=None):
+    # formulacao original com restricoes indicadoras, que so o Gurobi aceita
+    import gurobipy as gp
+    from gurobipy import GRB
+
     model = gp.Model()
-    model.setParam("Heuristics", 0)
     #model.setParam("Method", 1)
-    model.setParam("Presolve", 0)
-    model.setParam("NodefileStart", 0.25)
-    model.setParam('Threads', 1)
-
-    # Atualizar Q_pka com base nos dados de entrada
-    Q_pka = {(p, k, a): 0 for p in P for k in K for a in A}
-    Q_pka.update(data_Q)
+    for parametro, valor in {**PARAMETROS_PADRAO, **(parametros or {})}.items():
+        model.setParam(parametro, valor)
 
     corridor_indices = {k: idx + 1 for idx, k in enumerate(K)}
     C_to_index = {c: idx + 1 for idx, c in enumerate(C)}
-    P_to_index = {p: idx + 1 for idx, p in enumerate(P)}
-    J_to_index = {j: idx + 1 for idx, j in enumerate(J)}
-    #I_to_index = {i: idx + 1 for idx, i in enumerate(I)}
-    #A_to_index = {a: idx + 1 for idx, a in enumerate(A)}
 
-    random.seed(42)
-    # Dados q_pi fornecidos como entrada
-    q_pi = q_pi_input
+    triplas, KA, ka_da_tripla, S_E, S_D, pecas_caixa, triplas_por_ka, triplas_por_andar = indices_esparsos(I, data_Q, q_pi)
+    Q_s = np.array([data_Q[tripla] for tripla in triplas], dtype=float)
 
-    # Gerar classes das caixas
-    #C_i = {i: random.choice(list(C_to_index.values())) for i in I}
     # Variáveis
     C_i = model.addVars(I, vtype=GRB.INTEGER, lb=min(C_to_index.values()), ub=max(C_to_index.values()), name="C_i")
+    if classe_caixa is not None:
+        # a classe de cada caixa e um dado: C_i fica fixo
+        for i in I:
+            C_i[i].LB = C_i[i].UB = C_to_index[classe_caixa[i]]
     Z_j = model.addVars(J, vtype=GRB.INTEGER, lb=min(C_to_index.values()), ub=max(C_to_index.values()), name="Z_j")
     x_ij = model.addVars(I, J, vtype=GRB.BINARY, name="x_ij")
-    t_kaj = model.addVars(K, A, J, vtype=GRB.BINARY, name="t_kaj")
+    # t_kaj apenas para os pares (k, a) com estoque
+    t_kaj = model.addVars(gp.tuplelist((k, a, j) for k, a in KA for j in J), vtype=GRB.BINARY, name="t_kaj")
     # Z_aj: Se algum produto foi escolhido em aj (Binário)
     Z_aj = model.addVars(A, J, vtype=GRB.BINARY, name="Z_aj")
     # Variável indicadora que será 1 se algum produto foi escolhido na onda j andar a (Binário)
     A_aj = model.addVars(A, J, vtype=GRB.BINARY, name="A_aj")
     # E_pkaj: Quantity of product p picked from corridor k on floor a in wave j (InteiroNãoNegat.)
-    E_pkaj = model.addVars(P, K, A, J, vtype=GRB.INTEGER, lb=0, name="E_pkaj")
+    # apenas para as triplas (p, k, a) com estoque de produtos demandados
+    E_pkaj = model.addVars(gp.tuplelist((p, k, a, j) for p, k, a in triplas for j in J), vtype=GRB.INTEGER, lb=0, name="E_pkaj")
 
-    #memory_usage = sys.getsizeof(E_pkaj)
-    #print(f"Estimated memory usage of E_pkaj: {memory_usage / 1e3:.2f} MB")
+    # visões matriciais (sem copiar variáveis) para criar as restrições lineares em lote
+    x = gp.MVar.fromlist([[x_ij[i, j] for j in J] for i in I])
+    E = gp.MVar.fromlist([[E_pkaj[p, k, a, j] for j in J] for p, k, a in triplas])
 
     print("terminou as variaveis")
     ## Variáveis da função objetivo
@@ -56,19 +72,16 @@ def resolve_modelo(P, K, A, I, J, C, data_Q, q_pi_input):
 
     # Constraints
     ## Capacity of waves
-    model.addConstrs(
-        (
-            gp.quicksum(q_pi[p, i] * x_ij[i, j] for p in P for i in I) <= 6000
-            for j in J
-        ),
-        name="wave_capacity"
-    )
+    model.addConstr(pecas_caixa @ x <= 6000, name="wave_capacity")
 
     # Add constraint: Each box is assigned to exactly one wave
-    model.addConstrs(
-        (gp.quicksum(x_ij[i, j] for j in J) == 1 for i in I),
-        name="single_allocation"
-    )
+    model.addConstr(x.sum(axis=1) == 1, name="single_allocation")
+
+    # Add constraint: Sum of E_pkaj = Sum of q_pi * x_ij (uma linha por produto demandado)
+    for j_idx, j in enumerate(J):
+        model.addConstr(S_E @ E[:, j_idx] == S_D @ x[:, j_idx], name=f"picking_balance_{j}")
+
+    model.addConstr(E.sum(axis=1) <= Q_s, name="max_picking_capacity")
 
     for i in I:
         for j in J:
@@ -80,185 +93,224 @@ def resolve_modelo(P, K, A, I, J, C, data_Q, q_pi_input):
                 name=f"class_match_{i}_{j}"
             )
 
-    # Add constraint: Sum of E_pkaj = Sum of q_pi * x_ij
-    model.addConstrs(
-        (
-            gp.quicksum(E_pkaj[p, k, a, j] for a in A for k in K) ==
-            gp.quicksum(q_pi[p, i] * x_ij[i, j] for i in I)
-            for p in P
-            for j in J
-        ),
-        name="picking_balance"
-    )
-
-    model.addConstrs(
-        (
-            gp.quicksum(E_pkaj[p, k, a, j] for j in J) <= Q_pka[p, k, a]
-            for p in P
-            for k in K
-            for a in A
-        ),
-        name="max_picking_capacity"
-    )
-    for k in K:
-        for a in A:
-            for j in J:
-                # If t_kaj = 0, then sum_p E_pkaj <= 0 (force t_kaj to 1 if sum_p E_pkaj > 0)
-                model.addGenConstrIndicator(
-                    t_kaj[k, a, j],
-                    0,
-                    gp.quicksum(E_pkaj[p, k, a, j] for p in P) == 0,
-                    name=f"t_kaj_zero_{k}_{a}_{j}"
-                )
-                model.addGenConstrIndicator(
-                    t_kaj[k, a, j],
-                    1,
-                    gp.quicksum(E_pkaj[p, k, a, j] for p in P) >= 1,
-                    name=f"t_kaj_one_{k}_{a}_{j}"
-                )
+    def soma_retirada(slots, j_idx):
+        return gp.quicksum(E_pkaj[(*triplas[s], J[j_idx])] for s in slots)
 
-    for a in A:
-        for j in J:
+    for ka_idx, (k, a) in enumerate(KA):
+        for j_idx, j in enumerate(J):
+            retirada = soma_retirada(triplas_por_ka[ka_idx], j_idx)
             # If t_kaj = 0, then sum_p E_pkaj <= 0 (force t_kaj to 1 if sum_p E_pkaj > 0)
             model.addGenConstrIndicator(
-                Z_aj[a,j],
+                t_kaj[k, a, j],
+                0,
+                retirada == 0,
+                name=f"t_kaj_zero_{k}_{a}_{j}"
+            )
+            model.addGenConstrIndicator(
+                t_kaj[k, a, j],
+                1,
+                retirada >= 1,
+                name=f"t_kaj_one_{k}_{a}_{j}"
+            )
+
+    for a in A:
+        for j_idx, j in enumerate(J):
+            retirada = soma_retirada(triplas_por_andar[a], j_idx)
+            # If Z_aj = 0, then sum_{p,k} E_pkaj <= 0 (force Z_aj to 1 if sum > 0)
+            model.addGenConstrIndicator(
+                Z_aj[a, j],
                 0,
-                gp.quicksum(E_pkaj[p,k,a,j] for p in P for k in K) == 0,
+                retirada == 0,
                 name=f"Z_aj_zero_{a}_{j}"
             )
             model.addGenConstrIndicator(
                 Z_aj[a, j],
                 1,
-                gp.quicksum(E_pkaj[p,k,a,j] for p in P for k in K) >= 1,
+                retirada >= 1,
                 name=f"Z_aj_one_{a}_{j}"
             )
-
-    for a in A:
-        for j in J:
             # If A_aj = 0, then sum_{p,k} E_pkaj <= 0 (force A_aj to 1 if sum > 0)
             model.addGenConstrIndicator(
                 A_aj[a, j],
                 0,
-                gp.quicksum(E_pkaj[p,k,a,j] for p in P for k in K) == 0,
+                retirada == 0,
                 name=f"A_aj_zero_{a}_{j}"
             )
             model.addGenConstrIndicator(
                 A_aj[a, j],
                 1,
-                gp.quicksum(E_pkaj[p,k,a,j] for p in P for k in K) >= 1,
-                name=f"A_aj_zero_{a}_{j}"
+                retirada >= 1,
+                name=f"A_aj_one_{a}_{j}"
             )
-
-    for a in A:
-        for j in J:
             model.addGenConstrIndicator(
                 Z_aj[a, j],
                 0,
                 G_ja[j, a] == 0,
                 name=f"G_ja_lower_{a}_{j}"
             )
-            for k in K:
-            # If E_pkaj > 0, then G_ja >= k_idx
-                model.addGenConstrIndicator(
-                    t_kaj[k, a, j],
-                    1,
-                    G_ja[j, a] >= corridor_indices[k],
-                    name=f"G_ja_upper_{k}_{a}_{j}"
-                )
-
-
-    for a in A:
-        for j in J:
             model.addGenConstrIndicator(
                 Z_aj[a, j],
                 0,
                 L_ja[j, a] == 0,
                 name=f"L_ja_lower_{a}_{j}"
             )
-            for k in K:
-                # If E_pkaj > 0, then L_ja <= k_idx
-                model.addGenConstrIndicator(
-                    t_kaj[k, a, j],
-                    1,
-                    L_ja[j, a] <= corridor_indices[k],
-                    name=f"L_ja_upper_{k}_{a}_{j}"
-                )
+
+    for k, a in KA:
+        for j in J:
+            # If E_pkaj > 0, then G_ja >= k_idx
+            model.addGenConstrIndicator(
+                t_kaj[k, a, j],
+                1,
+                G_ja[j, a] >= corridor_indices[k],
+                name=f"G_ja_upper_{k}_{a}_{j}"
+            )
+            # If E_pkaj > 0, then L_ja <= k_idx
+            model.addGenConstrIndicator(
+                t_kaj[k, a, j],
+                1,
+                L_ja[j, a] <= corridor_indices[k],
+                name=f"L_ja_upper_{k}_{a}_{j}"
+            )
 
     # Objective Function
-    Z = gp.quicksum(
-        (G_ja[j, a] - L_ja[j, a]) + P1 * A_aj[a, j] + gp.quicksum(t_kaj[k, a, j] for k in K)
-        for a in A for j in J
-    )
+    Z = G_ja.sum() - L_ja.sum() + P1 * A_aj.sum() + t_kaj.sum()
     model.setObjective(Z, sense=GRB.MINIMIZE)
 
+    variaveis = {
+        "C_i": C_i, "Z_j": Z_j, "x_ij": x_ij, "t_kaj": t_kaj, "Z_aj": Z_aj,
+        "A_aj": A_aj, "E_pkaj": E_pkaj, "G_ja": G_ja, "L_ja": L_ja,
+    }
+    if partida is not None:
+        aplica_solucao_inicial(variaveis, *partida)
+
     # Solve the model
     model.optimize()
 
-    if model.status == GRB.OPTIMAL:
-        print("Solução ótima encontrada!")
-        for j in J:  # Itera sobre as ondas
-            print(f"\nOnda {j}:")
+    solucao = Solucao(status=str(model.Status), otima=model.status == GRB.OPTIMAL, segundos=model.Runtime)
+    valores = None
+    if model.SolCount > 0:
+        solucao.objetivo = model.ObjVal
+        valores = {nome: {chave: var.X for chave, var in variavel.items()} for nome, variavel in variaveis.items()}
+    solucao.limite = limite_gurobi(model)
+    return solucao, valores, KA
 
-            # Lista de corredores usados na onda
-            corredores_usados = [
-                k for a in A for k in K if t_kaj[k, a, J_to_index[j]].x >= 1
-            ]
 
-            # Lista de caixas alocadas na onda
-            caixas_alocadas = [
-                i for i in I if any(x_ij[i, J_to_index[j]].x >= 1 for j in J)
-            ]
+def resolve_modelo(P, K, A, I, J, C, data_Q, q_pi_input, formulacao="indicadores", parametros=None, solucao_inicial=None, solver="gurobi", caminho_mps=None, classe_caixa=None):
+    # formulacao: "indicadores" (restricoes indicadoras, apenas Gurobi) ou "linear" (big-M com limites
+    # dos dados e quebra de simetria das ondas, pela camada de modelagem: solver "gurobi", "highs" ou
+    # "mps", que so escreve o modelo); parametros sao repassados ao solver (no Gurobi, sobrescrevem
+    # PARAMETROS_PADRAO); solucao_inicial: solucao exportada pelo simulated annealing, usada como partida.
+    # "decomposta" resolve a formulacao linear por classe de onda, em paralelo (ver decomposicao.py),
+    # e precisa de classe_caixa ({caixa: classe}); nela J e recalculado e a partida nao e usada.
+    # Nas demais, classe_caixa (opcional) fixa C_i na classe de cada caixa
+    P1 = 1
+    corridor_indices = {k: idx + 1 for idx, k in enumerate(K)}
+    C_to_index = {c: idx + 1 for idx, c in enumerate(C)}
 
-            # Quantidade total de produtos escolhidos na onda
-            quantidade_produtos = sum(
-                E_pkaj[P_to_index[p], k, a, J_to_index[j]].x for p in P for k in K for a in A
-            )
+    # Dados q_pi fornecidos como entrada (apenas os pares com demanda)
+    q_pi = q_pi_input
+    partida, objetivo_heuristica = None, None
+    if solucao_inicial is not None and formulacao != "decomposta":
+        valores, objetivo_heuristica, completa = valores_iniciais(
+            solucao_inicial, I, J, C_to_index, corridor_indices, P1
+        )
+        partida = (valores, completa)
+        print(f"Partida do SA ({'completa' if completa else 'parcial'}) com objetivo {objetivo_heuristica}")
+
+    if formulacao == "linear":
+        modelo, KA = constroi_modelo_linear(K, A, I, J, C, data_Q, q_pi, P1, classe_caixa)
+        if partida is not None:
+            define_solucao_inicial(modelo, *partida)
+        if solver == "gurobi":
+            parametros = {**PARAMETROS_PADRAO, **(parametros or {})}
+        solucao = modelo.resolve(solver, parametros, caminho_mps)
+        valores = None
+        if solucao.valores is not None:
+            valores = {nome: modelo.valores(nome, solucao) for nome in modelo.familias}
+    elif formulacao == "decomposta":
+        if solver == "mps":
+            raise ValueError("A formulacao decomposta precisa de um solver")
+        if solver == "gurobi":
+            parametros = {**PARAMETROS_PADRAO, **(parametros or {})}
+        solucao, valores, J, KA = resolve_decomposto(K, A, I, C, data_Q, q_pi, classe_caixa, solver=solver, parametros=parametros)
+    elif solver == "gurobi":
+        solucao, valores, KA = resolve_indicadores(K, A, I, J, C, data_Q, q_pi, parametros, partida, P1, classe_caixa)
+    else:
+        raise ValueError("A formulacao com restricoes indicadoras so pode ser resolvida pelo Gurobi")
+
+    if solver == "mps":
+        print(f"Modelo escrito em {caminho_mps or modelo.nome + '.mps'}")
+        return solucao
+    limite = f", limite inferior: {solucao.limite}" if solucao.limite is not None else ""
+    print(f"Status: {solucao.status}, objetivo: {solucao.objetivo}{limite}, tempo: {solucao.segundos:.2f}s")
 
-            # Mapeamento corredor -> caixas
-            corredor_caixa = {
-                k: [
-                    i for i in I
-                    if any(E_pkaj[P_to_index[p], k, a, J_to_index[j]].x > 0 for p in P for a in A)
-                ]
-                for k in K
-            }
-
-            print(f"  Corredores: {corredores_usados}")
-            print(f"  Caixas: {caixas_alocadas}")
-            print(f"  Quantidade de produtos: {quantidade_produtos}")
-            print(f"  Corredor-caixa: {corredor_caixa}")
-
-            csv_data = set()
-
-            for j in J:  # Iterar sobre as ondas
-                for i in I:  # Iterar sobre as caixas
-                    for p in P:  # Iterar sobre os produtos
-                        for k in K:  # Iterar sobre os corredores
-                            for a in A:  # Iterar sobre os andares
-                                # Filtrar somente caixas alocadas e com PECAS > 0
-                                if x_ij[i, j].x > 0.5 and q_pi[p, i] > 0:
-                                    if t_kaj[k, a, J_to_index[j]].x > 0.5:  # Apenas se o corredor foi usado
-                                        # Adicionar como tupla ao conjunto
-                                        csv_data.add((
-                                            j,  # ONDA
-                                            i,  # CAIXA
-                                            int(q_pi[p, i]),  # PECAS
-                                            f"CLASSE_ONDA_{int(Z_j[j].x)}",  # CLASSE_ONDA
-                                            p,  # SKU
-                                            k,  # Corredor
-                                            a  # Andar
-                                        ))
-
-                # Escrever o arquivo CSV
-            with open("resultado_modelo_filtrado.csv", "w", newline="") as csvfile:
-                fieldnames = ["ONDA", "CAIXA", "PECAS", "CLASSE_ONDA", "SKU", "Corredor", "Andar"]
-                writer = csv.writer(csvfile)
-
-                writer.writerow(fieldnames)  # Escrever cabeçalhos
-                writer.writerows(csv_data)  # Escrever dados sem duplicatas
-
-            # Validar o resultado
-            valida_resultado(q_pi, Q_pka, corridor_indices, I, J, P, K, A, Z_j, x_ij, t_kaj, E_pkaj, C_i)
+    if objetivo_heuristica is not None and solucao.limite is not None:
+        # gap da heuristica em relacao ao melhor limite inferior provado pelo solver
+        gap = (objetivo_heuristica - solucao.limite) / abs(objetivo_heuristica) if objetivo_heuristica else 0.0
+        print(f"Objetivo do SA: {objetivo_heuristica}, limite inferior: {solucao.limite}, gap do SA: {gap:.2%}")
 
+    if solucao.otima or solucao.status == OTIMA_DECOMPOSTA:
+        if solucao.otima:
+            print("Solução ótima encontrada!")
+        else:
+            print("Solução ótima para a divisão do estoque entre as classes (sem prova de otimalidade do problema original)")
+        escreve_resultado(valores, q_pi, I, J, KA)
+        # Validar o resultado
+        valida_resultado(q_pi, data_Q, corridor_indices, I, J, P, K, A, valores["Z_j"], valores["x_ij"], valores["t_kaj"], valores["E_pkaj"], valores["C_i"])
     else:
-        print("Nenhuma solução encontrada.")
\ No newline at end of file
+        print("Nenhuma solução encontrada.")
+    return solucao
+
+
+def escreve_resultado(valores, q_pi, I, J, KA):
+    x_ij, t_kaj, Z_j = valores["x_ij"], valores["t_kaj"], valores["Z_j"]
+    E_x = {chave: e for chave, e in valores["E_pkaj"].items() if e > 0.5}
+    caixas_por_onda = {j: [i for i in I if x_ij.get((i, j), 0) > 0.5] for j in J}
+    caixas_por_produto = defaultdict(list)
+    for (p, i), q in q_pi.items():
+        if q > 0:
+            caixas_por_produto[p].append(i)
+
+    csv_data = set()
+    for j in J:  # Itera sobre as ondas
+        print(f"\nOnda {j}:")
+        caixas_alocadas = caixas_por_onda[j]
+        caixas_onda = set(caixas_alocadas)
+
+        # Lista de corredores usados na onda
+        corredores_usados = [k for k, a in KA if t_kaj.get((k, a, j), 0) >= 0.5]
+
+        # Quantidade total de produtos escolhidos na onda
+        quantidade_produtos = sum(e for (p, k, a, onda), e in E_x.items() if onda == j)
+
+        # Mapeamento corredor -> caixas (caixas da onda que pedem produtos retirados no corredor)
+        corredor_caixa = defaultdict(set)
+        for (p, k, a, onda) in E_x:
+            if onda != j:
+                continue
+            for i in caixas_por_produto[p]:
+                if i in caixas_onda:
+                    corredor_caixa[k].add(i)
+                    # Adicionar como tupla ao conjunto
+                    csv_data.add((
+                        j,  # ONDA
+                        i,  # CAIXA
+                        int(q_pi[p, i]),  # PECAS
+                        f"CLASSE_ONDA_{int(round(Z_j[j]))}",  # CLASSE_ONDA
+                        p,  # SKU
+                        k,  # Corredor
+                        a  # Andar
+                    ))
+
+        print(f"  Corredores: {corredores_usados}")
+        print(f"  Caixas: {caixas_alocadas}")
+        print(f"  Quantidade de produtos: {quantidade_produtos}")
+        print(f"  Corredor-caixa: {dict(corredor_caixa)}")
+
+    # Escrever o arquivo CSV
+    with open("resultado_modelo_filtrado.csv", "w", newline="") as csvfile:
+        fieldnames = ["ONDA", "CAIXA", "PECAS", "CLASSE_ONDA", "SKU", "Corredor", "Andar"]
+        writer = csv.writer(csvfile)
+
+        writer.writerow(fieldnames)  # Escrever cabeçalhos
+        writer.writerows(csv_data)  # Escrever dados sem duplicatas
@@ -0,0 +1,220 @@
+from random import choice, choices, randint, sample
+from typing import Callable, Dict, List
+
+from box import Box
+from wave import Wave
+
+
+class Moves:
+    """Move library of the wave annealing, working on boxes, picks and whole waves.
+
+    Every move changes the solution in place through journaled calls, so a rejected move is
+    undone by a journal rollback and DeltaCost re-scores only the waves the move touched.
+    The move of each iteration is drawn by roulette over adaptive weights: after every
+    segment of move_segment iterations, the weight of a move drifts (by move_reaction)
+    towards the average score of its outcomes in that segment.
+    """
+
+    # score of a move outcome (see reward)
+    SCORES = {"best": 3, "improved": 2, "accepted": 1, "rejected": 0}
+    MIN_WEIGHT = 0.05
+
+    def __init__(self, annealing):
+        self.annealing = annealing
+        self.operators: Dict[str, Callable[[], bool]] = {
+            "relocate": self.relocate_box,
+            "swap": self.swap_boxes,
+            "reroute": self.reroute_pick,
+            "corridors": self.reallocate_corridors,
+            "merge": self.merge_waves,
+            "split": self.split_wave,
+        }
+        self.weights: Dict[str, float] = {name: 1.0 for name in annealing.config.moves}
+        self.scores: Dict[str, float] = dict.fromkeys(self.weights, 0.0)
+        self.uses: Dict[str, int] = dict.fromkeys(self.weights, 0)
+        self.box_ids: List[int] = []
+        self.last: str | None = None
+        self.iterations = 0
+
+    def apply(self) -> str | None:
+        """Apply one feasible move, returning its name (None if every draw was infeasible)."""
+        if not self.box_ids:
+            self.box_ids = list(self.annealing.boxes)
+        names = list(self.weights)
+        self.last = None
+        for _ in range(len(names)):
+            name = choices(names, weights=[self.weights[name] for name in names])[0]
+            if self.operators[name]():
+                self.last = name
+                break
+        return self.last
+
+    def reward(self, outcome: str) -> None:
+        """Score the last move with an outcome of SCORES and adapt the weights at segment ends."""
+        if self.last is not None:
+            self.scores[self.last] += self.SCORES[outcome]
+            self.uses[self.last] += 1
+        self.iterations += 1
+        if self.iterations % self.annealing.config.move_segment:
+            return
+        reaction = self.annealing.config.move_reaction
+        for name in self.weights:
+            if self.uses[name]:
+                average = self.scores[name] / self.uses[name]
+                self.weights[name] = max(self.MIN_WEIGHT, (1 - reaction) * self.weights[name] + reaction * average)
+            self.scores[name], self.uses[name] = 0.0, 0
+
+    def class_waves(self, wave_class: str, exclude: Wave) -> List[Wave]:
+        return [
+            wave for wave in self.annealing.waves.values()
+            if wave.wave_class == wave_class and wave is not exclude
+        ]
+
+    def remove_pick(self, wave: Wave, corridor_id: int, box: Box, sku: str, quantity: int) -> None:
+        """Take the whole pick of a box SKU in a corridor out of the wave, refilling the corridor."""
+        annealing = self.annealing
+        corridor = annealing.corridors[corridor_id]
+        wave.remove_pick(corridor_id, box.id, sku, quantity)
+        annealing.journal.record(wave.add_corridor, corridor_id, box.id, sku, quantity)
+        corridor.add_product(sku, quantity)
+        annealing.journal.record(corridor.take, {sku: quantity})
+        box.remove_corridor_product(corridor_id, sku)
+        annealing.journal.record(box.add_corridor, corridor_id, sku)
+
+    def remove_box(self, box: Box) -> None:
+        wave = self.annealing.waves[box.wave]
+        for corridor_id, skus in list(box.corridors.items()):
+            for sku in list(skus):
+                self.remove_pick(wave, corridor_id, box, sku, wave.corridors[corridor_id][box.id][sku])
+
+    def insert_box(self, box: Box, wave: Wave) -> None:
+        self.annealing.journal.record(box.set_wave, box.wave)
+        box.set_wave(wave.id)
+        self.annealing.allocate_boxes_to_corridors(box, wave.id, self.annealing.corridors)
+
+    def move_box(self, box: Box, wave: Wave) -> None:
+        self.remove_box(box)
+        self.insert_box(box, wave)
+
+    def open_wave(self, wave_class: str) -> Wave:
+        wave = Wave(
+            wave_class, max(self.annealing.waves) + 1, self.annealing.inventory.corridor_layout, self.annealing.box_classes
+        )
+        self.restore_wave(wave)
+        self.annealing.journal.record(self.discard_wave, wave)
+        return wave
+
+    def drop_wave(self, wave: Wave) -> None:
+        self.discard_wave(wave)
+        self.annealing.journal.record(self.restore_wave, wave)
+
+    def discard_wave(self, wave: Wave) -> None:
+        self.annealing.delta_cost.remove_wave(wave)
+        del self.annealing.waves[wave.id]
+
+    def restore_wave(self, wave: Wave) -> None:
+        self.annealing.waves[wave.id] = wave
+        self.annealing.delta_cost.add_wave(wave)
+
+    def relocate_box(self) -> bool:
+        """Move a random box to another wave of its class with room for it."""
+        box = self.annealing.boxes[choice(self.box_ids)]
+        source = self.annealing.waves[box.wave]
+        size = box.get_total_products()
+        targets = [
+            wave for wave in self.class_waves(box.wave_class, source)
+            if wave.total_products + size <= self.annealing.config.max_wave_capacity
+        ]
+        if not targets:
+            return False
+        self.move_box(box, choice(targets))
+        if not source.corridors:
+            self.drop_wave(source)
+        return True
+
+    def swap_boxes(self) -> bool:
+        """Exchange a random box with a box of another wave of the same class."""
+        box = self.annealing.boxes[choice(self.box_ids)]
+        wave = self.annealing.waves[box.wave]
+        others = self.class_waves(box.wave_class, wave)
+        if not others:
+            return False
+        other_wave = choice(others)
+        other_box = self.annealing.boxes[choice(list(self.annealing.get_boxes_ids_from_wave(other_wave)))]
+        size, other_size = box.get_total_products(), other_box.get_total_products()
+        capacity = self.annealing.config.max_wave_capacity
+        if wave.total_products - size + other_size > capacity or other_wave.total_products - other_size + size > capacity:
+            return False
+        self.remove_box(box)
+        self.remove_box(other_box)
+        self.insert_box(box, other_wave)
+        self.insert_box(other_box, wave)
+        return True
+
+    def reroute_pick(self) -> bool:
+        """Send one pick of a wave to the cheapest other corridor for the wave."""
+        wave = choice(list(self.annealing.waves.values()))
+        if not wave.corridors:
+            return False
+        corridor_id = choice(list(wave.corridors))
+        box_id = choice(list(wave.corridors[corridor_id]))
+        sku = choice(list(wave.corridors[corridor_id][box_id]))
+        quantity = wave.corridors[corridor_id][box_id][sku]
+        box = self.annealing.boxes[box_id]
+        self.remove_pick(wave, corridor_id, box, sku, quantity)
+        self.annealing.allocate_product(box, wave.id, sku, quantity, self.annealing.corridors, avoid=corridor_id)
+        return True
+
+    def reallocate_corridors(self) -> bool:
+        """Empty random corridors of one wave and send their picks to random corridors.
+
+        The number of corridors shrinks with the temperature, from half of the wave down to one.
+        """
+        annealing = self.annealing
+        wave = choice(list(annealing.waves.values()))
+        if not wave.corridors:
+            return False
+        max_swaps = len(wave.corridors) // 2
+        temp_ratio = min(1.0, annealing.temperature / annealing.max_temp)
+        picks = []
+        for corridor_id in sample(sorted(wave.corridors), randint(1, max(1, int(max_swaps * temp_ratio)))):
+            for box_id, products in list(wave.corridors[corridor_id].items()):
+                for sku, quantity in list(products.items()):
+                    self.remove_pick(wave, corridor_id, annealing.boxes[box_id], sku, quantity)
+                    picks.append((box_id, sku, quantity))
+        for box_id, sku, quantity in picks:
+            annealing.allocate_product(annealing.boxes[box_id], wave.id, sku, quantity, annealing.corridors, True)
+        return True
+
+    def merge_waves(self) -> bool:
+        """Empty a random wave into another wave of its class with room for all its boxes."""
+        wave = choice(list(self.annealing.waves.values()))
+        targets = [
+            other for other in self.class_waves(wave.wave_class, wave)
+            if other.total_products + wave.total_products <= self.annealing.config.max_wave_capacity
+        ]
+        if not targets:
+            return False
+        target = choice(targets)
+        for box in self.annealing.get_boxes_from_wave(wave):
+            self.move_box(box, target)
+        self.drop_wave(wave)
+        return True
+
+    def split_wave(self) -> bool:
+        """Move the boxes in the upper half of a random wave's corridor range to a new wave."""
+        inventory = self.annealing.inventory
+        wave = choice(list(self.annealing.waves.values()))
+        boxes = self.annealing.get_boxes_from_wave(wave)
+        if len(boxes) < 2:
+            return False
+
+        def position(box: Box) -> int:
+            positions = sorted(inventory.corridor_positions[corridor_id] for corridor_id in box.corridors)
+            return positions[len(positions) // 2] if positions else 0
+
+        boxes.sort(key=lambda box: (position(box), box.id))
+        new_wave = self.open_wave(wave.wave_class)
+        for box in boxes[len(boxes) // 2:]:
+            self.move_box(box, new_wave)
+        return True
@@ -0,0 +1,134 @@
+import math
+import multiprocessing
+import os
+import random
+import time
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from instance_cache import load_instance
+from simulated_annealing import Config, SimulatedAnnealing
+
+
+@dataclass
+class ChainResult:
+    seed: int
+    initial_temp: float
+    best_cost: float
+    final_cost: float
+    final_temperature: float
+    iterations: int
+    accepted_moves: int
+    exchanges: int
+    seconds: float
+    solution: Dict[int, dict] = field(repr=False, default_factory=dict)
+
+
+def _chain_worker(connection, stock_layout_file, product_boxes_file, config: Config, seed: int) -> None:
+    random.seed(seed)
+    instance = load_instance(stock_layout_file, product_boxes_file)
+    sa = SimulatedAnnealing(instance.stock_layout, instance.product_boxes, config)
+    sa.fill_boxes()
+    sa.fill_corridors(instance.inventory())
+    started = time.perf_counter()
+    sa.start()
+    connection.send((sa.actual_cost, sa.temperature, sa.is_running()))
+    while True:
+        command, iterations, temperature = connection.recv()
+        if command == "run":
+            sa.temperature = temperature
+            sa.anneal(iterations)
+            connection.send((sa.actual_cost, sa.temperature, sa.is_running()))
+        else:
+            final_cost, final_temperature = sa.actual_cost, sa.temperature
+            sa.finish()
+            connection.send((
+                sa.solution_cost, final_cost, final_temperature, sa.iteration,
+                sa.accepted_moves, time.perf_counter() - started, sa.export_solution(),
+            ))
+            break
+    connection.close()
+
+
+def exchange_temperatures(costs: Sequence[float], temperatures: List[float]) -> List[int]:
+    """Replica exchange between chains at neighbouring temperatures (Metropolis swap rule).
+
+    Swaps the temperatures in place and returns the indexes of the chains that swapped.
+    """
+    order = sorted(range(len(temperatures)), key=lambda chain: temperatures[chain])
+    swapped = []
+    for cold, hot in zip(order, order[1:]):
+        exponent = (costs[cold] - costs[hot]) * (1 / temperatures[cold] - 1 / temperatures[hot])
+        if exponent >= 0 or random.random() < math.exp(exponent):
+            temperatures[cold], temperatures[hot] = temperatures[hot], temperatures[cold]
+            swapped.extend((cold, hot))
+    return swapped
+
+
+def parallel_annealing(
+        stock_layout_file: str,
+        product_boxes_file: str,
+        chains: int = None,
+        config: Config = Config(),
+        seeds: Sequence[int] = None,
+        temperatures: Sequence[float] = None,
+        exchange_interval: Optional[int] = None,
+) -> Tuple[ChainResult, List[ChainResult]]:
+    """Run independent annealing chains in worker processes and keep the best one.
+
+    Chains differ by seed and, optionally, initial temperature. With exchange_interval set,
+    the chains pause every that many iterations and swap temperatures (parallel tempering);
+    otherwise each chain is a plain multi-start run.
+    """
+    chains = chains or len(temperatures or ()) or os.cpu_count()
+    seeds = list(seeds) if seeds is not None else list(range(chains))
+    temperatures = list(temperatures) if temperatures is not None else [config.initial_temp] * chains
+    # chains report through ChainResult, so their per-iteration output is turned off
+    configs = [replace(config, initial_temp=temperature, verbose=False) for temperature in temperatures]
+
+    context = multiprocessing.get_context()
+    connections, processes = [], []
+    for chain in range(chains):
+        parent_connection, child_connection = context.Pipe()
+        process = context.Process(
+            target=_chain_worker,
+            args=(child_connection, stock_layout_file, product_boxes_file, configs[chain], seeds[chain]),
+            daemon=True,
+        )
+        process.start()
+        connections.append(parent_connection)
+        processes.append(process)
+
+    states = [connection.recv() for connection in connections]
+    current_temperatures = [state[1] for state in states]
+    exchanges = [0] * chains
+    interval = exchange_interval or config.sa_max
+    while any(state[2] for state in states):
+        for connection, temperature in zip(connections, current_temperatures):
+            connection.send(("run", interval, temperature))
+        states = [connection.recv() for connection in connections]
+        current_temperatures = [state[1] for state in states]
+        if exchange_interval:
+            for chain in exchange_temperatures([state[0] for state in states], current_temperatures):
+                exchanges[chain] += 1
+
+    results = []
+    for chain, connection in enumerate(connections):
+        connection.send(("finish", 0, None))
+        best_cost, final_cost, final_temperature, iterations, accepted, seconds, solution = connection.recv()
+        results.append(ChainResult(
+            seed=seeds[chain],
+            initial_temp=temperatures[chain],
+            best_cost=best_cost,
+            final_cost=final_cost,
+            final_temperature=final_temperature,
+            iterations=iterations,
+            accepted_moves=accepted,
+            exchanges=exchanges[chain],
+            seconds=seconds,
+            solution=solution,
+        ))
+    for process in processes:
+        process.join()
+
+    return min(results, key=lambda result: result.best_cost), results
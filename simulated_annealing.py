@@ -1,11 +1,19 @@
+import heapq
 import math
-from random import randint, random, sample, shuffle
+import time
+from random import choice, random
 
 from box import Box
 from corridor import Corridor
+from delta_cost import DeltaCost
+from inventory import Inventory
+from journal import Journal
+from moves import Moves
+from telemetry import Telemetry
+from validation import SolutionValidator
 from wave import Wave
 from collections import defaultdict
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 
 # Definir qual caixa deve ser alocada a qual onda de forma que a área de picking média das ondas seja a
@@ -23,8 +31,35 @@ class Config:
     initial_temp: float = 1000
     alpha: float = 0.99
     sa_max: int = 300
+    # wall-clock budget in seconds; the run stops at the deadline with the best solution so far
+    # (sa_max still caps the iterations, so raise it to let the deadline end the run)
+    time_limit: Optional[float] = None
+    # the run also stops once the temperature falls to final_temp
+    final_temp: float = 1
+    # iterations without a new best before going back to the best solution and reheating to
+    # reheat * max_temp (0 never reheats)
+    stagnation_limit: int = 0
+    reheat: float = 0.5
+    # with sample_moves > 0, start() samples that many moves and sets initial_temp/final_temp so
+    # that the median worsening delta is accepted with these probabilities (see calibrate)
+    sample_moves: int = 0
+    initial_acceptance: float = 0.5
+    final_acceptance: float = 0.01
     floor_punishment_weight: int = 2
     corridor_punishment_weight: int = 1
+    class_punishment_weight: int = 1000
+    capacity_punishment_weight: int = 10
+    debug_delta_cost: bool = False
+    # check the whole solution with a SolutionValidator after the construction and after
+    # every new best solution
+    debug_validate: bool = False
+    # per-iteration prints; for progress data attach a Telemetry instead
+    verbose: bool = False
+    moves: Tuple[str, ...] = ("relocate", "swap", "reroute", "corridors", "merge", "split")
+    move_segment: int = 50
+    move_reaction: float = 0.2
+    # boxes each corridor offers as candidates while the construction grows a wave (see cluster_boxes)
+    cluster_candidates: int = 32
 
 
 class SimulatedAnnealing:
@@ -32,7 +67,8 @@ class SimulatedAnnealing:
             self,
             stock_layout: Dict[str, List],
             product_boxes: Dict[str, List],
-            config: Config = Config()
+            config: Config = Config(),
+            telemetry: Telemetry = None
     ):
         self.product_boxes = product_boxes["box_id"]
         self.stock_corridors = stock_layout["corridor"]
@@ -43,91 +79,285 @@ class SimulatedAnnealing:
         self.corridor_skus = stock_layout["sku"]
         self.corridor_pieces = stock_layout["pieces"]
         self.config = config
+        self.telemetry = telemetry
 
         self.boxes: Dict[int, Box] = {}
-        self.corridors: Dict[str, Corridor] = {}
-        self.product_to_corridors: Dict[str, List[str]] = defaultdict(list)
+        # box_id -> wave class, shared by the waves for their per-class box counts
+        self.box_classes: Dict[int, str] = {}
+        self.inventory: Inventory = None
+        # indexed by the Inventory corridor id
+        self.corridors: List[Corridor] = []
+        self.claimed_corridors: set = set()
+        self.span_weight = 1.0
+        self.wave_plan: set = set()
         self.waves: Dict[int, Wave] = {}
+        self.delta_cost = DeltaCost(self)
+        self.journal = Journal()
+        self.moves = Moves(self)
+        self.validator: SolutionValidator = None
 
         self.best_solution = None
         self.actual_cost = 0
         self.solution_cost = 0
+        self.iteration = 0
+        self.accepted_moves = 0
         self.temperature = self.config.initial_temp
         self.max_temp = self.config.initial_temp
+        self.final_temp = self.config.final_temp
+        self.alpha = self.config.alpha
+        self.deadline = None
+        self.last_improvement = 0
+        self.reheats = 0
 
     def fill_boxes(self) -> None:
-        for i, current_box_id in enumerate(self.product_boxes):
-            current_box_id = int(current_box_id)
-            if current_box_id not in self.boxes:
-                self.boxes[current_box_id] = Box(current_box_id, self.wave_classes[i])
-            self.boxes[current_box_id].add_product(self.products[i], self.box_pieces[i])
-
-    def fill_corridors(self) -> None:
-        for index, current_corridor in enumerate(self.stock_corridors):
-            corridor_key = f'{current_corridor}_{self.floors[index]}'
-            if corridor_key not in self.corridors:
-                self.corridors[corridor_key] = Corridor(self.floors[index])
-            self.corridors[corridor_key].add_product(
-                sku=self.corridor_skus[index],
-                quantity=self.corridor_pieces[index],
-            )
-            self.product_to_corridors[self.corridor_skus[index]].append(corridor_key) # trocar isso aqui para ter a quantidade tambem
+        self.boxes = Box.from_rows(self.product_boxes, self.wave_classes, self.products, self.box_pieces)
+        self.box_classes = {box_id: box.wave_class for box_id, box in self.boxes.items()}
+
+    def fill_corridors(self, inventory: Inventory = None) -> None:
+        if inventory is None:
+            corridor_keys = [f'{corridor}_{floor}' for corridor, floor in zip(self.stock_corridors, self.floors)]
+            inventory = Inventory.from_rows(corridor_keys, self.floors, self.corridor_skus, self.corridor_pieces)
+        self.inventory = inventory
+        self.corridors = [
+            Corridor(floor, self.inventory, corridor_id)
+            for corridor_id, (_, floor, _) in enumerate(self.inventory.corridor_layout)
+        ]
 
     def generate_initial_solution(self) -> None:
-        def reset_wave(wave: int, box: Box) -> Tuple[
-            int, int, str]:
-            wave += 1
-            wave_products_quantity = 0
-            current_wave_class = box.wave_class
-            self.waves[wave] = Wave(current_wave_class, wave)
-            return wave, wave_products_quantity, current_wave_class
-
-        corridors_copy = self.corridors.copy()
-        wave = 0
-        current_wave_class = self.wave_classes[0]
-
-        for box_id, box in self.boxes.items():
-            if wave not in self.waves:
-                self.waves[wave] = Wave(current_wave_class, wave)
-
-            total_products_box = box.get_total_products()
-            if self.waves[wave].total_products + total_products_box > self.config.max_wave_capacity or box.wave_class != current_wave_class:
-                wave, wave_products_quantity, current_wave_class = reset_wave(
-                    wave, box
-                )
-
-            box.set_wave(wave)
-
-            self.allocate_boxes_to_corridors(box, wave, corridors_copy)
-        print(self.validate_solution(self.waves))
-
-
-    def allocate_boxes_to_corridors(self, box: Box, wave: int, corridors: Dict[str, Corridor] = None, is_random = False) -> None:
-        for product in box.products:
-            product_quantity_remaining = product.quantity
-
-            while product_quantity_remaining > 0:
+        """Greedy-by-locality construction.
+
+        Boxes are grouped by class and, within a class, clustered into waves by the corridors
+        holding their SKUs (see cluster_boxes). The corridors of each wave are then planned as
+        a greedy cover of its SKUs (see plan_wave_corridors) and every pick goes to the stocked corridor
+        that adds the least to the wave cost (see find_local_corridor).
+        """
+        corridors_copy = list(self.corridors)
+        self.claimed_corridors = set()
+        # the area is averaged over the waves, so a span growth weighs 1 / (number of waves)
+        class_pieces = defaultdict(int)
+        for box in self.boxes.values():
+            class_pieces[box.wave_class] += box.get_total_products()
+        self.span_weight = 1 / max(1, sum(
+            math.ceil(pieces / self.config.max_wave_capacity) for pieces in class_pieces.values()
+        ))
+
+        boxes_by_class = defaultdict(list)
+        for box in self.boxes.values():
+            boxes_by_class[box.wave_class].append(box)
+        wave_boxes = [
+            boxes for wave_class in sorted(boxes_by_class)
+            for boxes in self.cluster_boxes(boxes_by_class[wave_class])
+        ]
+
+        for wave, boxes in enumerate(wave_boxes):
+            self.waves[wave] = Wave(boxes[0].wave_class, wave, self.inventory.corridor_layout, self.box_classes)
+            self.wave_plan = self.plan_wave_corridors(boxes)
+            for box in boxes:
+                box.set_wave(wave)
+                self.allocate_boxes_to_corridors(box, wave, corridors_copy)
+            # corridors of a finished wave count as taken for the next ones (overlap punishment)
+            self.claimed_corridors.update(self.waves[wave].corridors)
+        self.wave_plan = set()
+        self.claimed_corridors = set()
+        self.journal.commit()
+        if self.config.verbose:
+            print(self.validate_solution(self.waves))
+
+    def plan_wave_corridors(self, boxes: List[Box]) -> set:
+        """Greedy set cover of the wave SKUs by stocked corridors.
+
+        Repeatedly takes the corridor holding the most still uncovered SKUs, a corridor
+        already used by an earlier wave counting as (1 + corridor punishment) corridors.
+        """
+        skus = {sku for box in boxes for sku in box.products}
+        corridor_skus = defaultdict(set)
+        for sku in skus:
+            for corridor_id in self.inventory.slot_corridors[self.inventory.stocked_slots(sku)].tolist():
+                corridor_skus[corridor_id].add(sku)
+
+        def price(corridor_id: int) -> float:
+            return 1 + self.config.corridor_punishment_weight * (corridor_id in self.claimed_corridors)
+
+        # lazy greedy: a popped entry with a stale gain is pushed back with the current one
+        heap = [(-len(covered) / price(corridor_id), corridor_id) for corridor_id, covered in corridor_skus.items()]
+        heapq.heapify(heap)
+        uncovered = set(skus)
+        plan = set()
+        while heap and uncovered:
+            _, corridor_id = heapq.heappop(heap)
+            gain = len(corridor_skus[corridor_id] & uncovered)
+            if gain == 0:
+                continue
+            current = -gain / price(corridor_id)
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, corridor_id))
+                continue
+            plan.add(corridor_id)
+            uncovered -= corridor_skus[corridor_id]
+        return plan
+
+    def box_footprint(self, box: Box) -> set:
+        """Corridors holding stock of any of the box SKUs."""
+        footprint = set()
+        for sku in box.products:
+            footprint.update(self.inventory.slot_corridors[self.inventory.stocked_slots(sku)].tolist())
+        return footprint
+
+    def cluster_boxes(self, boxes: List[Box]) -> List[List[Box]]:
+        """Split boxes of one class into waves of boxes with overlapping footprints.
+
+        A wave starts from the remaining box with the smallest footprint and grows with the box sharing the most
+        corridors with the wave footprint (relative to its own footprint) that still fits, else with the smallest
+        remaining box that fits. A lazy max-heap scores the candidates offered by an inverted corridor -> boxes index;
+        each corridor offers only its config.cluster_candidates unassigned boxes with the smallest footprints and
+        assigned boxes are pruned from the index as it is walked, so a wave costs its footprint times
+        cluster_candidates and the clustering grows linearly with the number of boxes.
+        """
+        footprints = {box.id: self.box_footprint(box) for box in boxes}
+        sizes = {box.id: box.get_total_products() for box in boxes}
+        by_id = {box.id: box for box in boxes}
+        # largest footprint first, so the best candidates sit at the end of each list
+        order = sorted(by_id, key=lambda box_id: (len(footprints[box_id]), box_id), reverse=True)
+        corridor_boxes = defaultdict(list)
+        for box_id in order:
+            for corridor_id in footprints[box_id]:
+                corridor_boxes[corridor_id].append(box_id)
+
+        unassigned = set(by_id)
+        seeds = order[::-1]
+        smallest = [(sizes[box_id], box_id) for box_id in by_id]
+        heapq.heapify(smallest)
+        waves = []
+        while unassigned:
+            while seeds[-1] not in unassigned:
+                seeds.pop()
+            candidate = seeds.pop()
+            wave, wave_products, wave_footprint = [], 0, set()
+            shared = defaultdict(int)
+            heap = []
+            while candidate is not None:
+                unassigned.discard(candidate)
+                wave.append(by_id[candidate])
+                wave_products += sizes[candidate]
+                touched = set()
+                for corridor_id in footprints[candidate] - wave_footprint:
+                    wave_footprint.add(corridor_id)
+                    offered = self.corridor_candidates(corridor_boxes[corridor_id], unassigned)
+                    for box_id in offered:
+                        shared[box_id] += 1
+                    touched.update(offered)
+                for box_id in touched:
+                    heapq.heappush(heap, (-shared[box_id] / len(footprints[box_id]), box_id))
+                candidate = None
+                while heap:
+                    score, box_id = heapq.heappop(heap)
+                    if box_id not in unassigned or -score < shared[box_id] / len(footprints[box_id]):
+                        continue
+                    if wave_products + sizes[box_id] <= self.config.max_wave_capacity:
+                        candidate = box_id
+                        break
+                if candidate is None:
+                    # nothing sharing a corridor fits: fill up with the smallest box, if it does
+                    while smallest and smallest[0][1] not in unassigned:
+                        heapq.heappop(smallest)
+                    if smallest and wave_products + smallest[0][0] <= self.config.max_wave_capacity:
+                        candidate = heapq.heappop(smallest)[1]
+            waves.append(wave)
+        return waves
+
+    def corridor_candidates(self, listed: List[int], unassigned: set) -> List[int]:
+        """The last config.cluster_candidates unassigned boxes of a corridor list, dropping the
+        assigned boxes passed on the way."""
+        offered = []
+        position = len(listed)
+        while position and len(offered) < self.config.cluster_candidates:
+            position -= 1
+            if listed[position] in unassigned:
+                offered.append(listed[position])
+        listed[position:] = offered[::-1]
+        return offered
+
+    def allocate_boxes_to_corridors(self, box: Box, wave: int, corridors: List[Corridor] = None, is_random = False) -> None:
+        for sku, quantity in box.products.items():
+            self.allocate_product(box, wave, sku, quantity, corridors, is_random)
+
+    def allocate_product(self, box: Box, wave: int, sku: str, quantity: int, corridors: List[Corridor] = None, is_random = False, avoid: int = None) -> None:
+        product_quantity_remaining = quantity
+
+        while product_quantity_remaining > 0:
+            if is_random:
                 corridor_id, corridor, remaining = self.find_corridor(
-                    product.sku, product_quantity_remaining, corridors, is_random
+                    sku, product_quantity_remaining, corridors, is_random
+                )
+            else:
+                corridor_id, corridor, remaining = self.find_local_corridor(
+                    sku, product_quantity_remaining, self.waves[wave], corridors, avoid
                 )
 
-                if not corridor_id:
-                    raise Exception("Corridor not found")
-
-                box.add_corridor(corridor_id, product.sku)
-                self.waves[wave].add_corridor(corridor_id, box.id, product.sku, product_quantity_remaining)
-                product_quantity_remaining = remaining
-
-    def find_corridor(self, sku: str, quantity: int, corridors: Dict[str, Corridor] = None, is_random = False) -> Tuple[str, Corridor, int]:
-        possible_corridors = self.product_to_corridors.get(sku, [])
+            if corridor_id is None:
+                raise Exception("Corridor not found")
+
+            taken = product_quantity_remaining - remaining
+            self.journal.record(corridor.add_product, sku, taken)
+            if sku not in box.corridors.get(corridor_id, ()):
+                box.add_corridor(corridor_id, sku)
+                self.journal.record(box.remove_corridor_product, corridor_id, sku)
+            self.waves[wave].add_corridor(corridor_id, box.id, sku, taken)
+            self.journal.record(self.waves[wave].remove_pick, corridor_id, box.id, sku, taken)
+            product_quantity_remaining = remaining
+
+    def find_corridor(self, sku: str, quantity: int, corridors: List[Corridor] = None, is_random = False) -> Tuple[int, Corridor, int]:
+        """Random stocked corridor, or the best fit for the quantity (see Inventory.best_fit)."""
+        if corridors is None:
+            corridors = self.corridors
         if is_random:
-            shuffle(possible_corridors)
-        for corridor_id in possible_corridors:
-            corridor = corridors[corridor_id]
-            remaining = corridor.consume_product(sku, quantity)
-            if remaining is not None:
-                return corridor_id, corridor, remaining
-        return None, None, None
+            slots = self.inventory.stocked_slots(sku)
+            slot = int(choice(slots)) if len(slots) else None
+        else:
+            slot = self.inventory.best_fit(sku, quantity)
+        if slot is None:
+            return None, None, None
+        corridor_id = int(self.inventory.slot_corridors[slot])
+        remaining = self.inventory.take(slot, quantity)
+        return corridor_id, corridors[corridor_id], remaining
+
+    def find_local_corridor(self, sku: str, quantity: int, wave: Wave, corridors: List[Corridor] = None, avoid: int = None) -> Tuple[int, Corridor, int]:
+        """Stocked corridor that adds the least to the wave cost.
+
+        A corridor already in the wave or in its plan is free; otherwise it costs the growth
+        of the wave span on its floor and parity (times span_weight), the floor punishment if
+        the floor is new and the corridor punishment if another wave already uses it. Ties
+        go to corridors that serve the whole quantity, then to the fullest one; the avoid
+        corridor is only taken when no other corridor holds the SKU.
+        """
+        if corridors is None:
+            corridors = self.corridors
+        slots = self.inventory.stocked_slots(sku)
+        layout = self.inventory.corridor_layout
+        best_key, best_corridor = None, None
+        for slot, corridor_id, available in zip(
+                slots.tolist(), self.inventory.slot_corridors[slots].tolist(), self.inventory.stock[slots].tolist()
+        ):
+            cost = 0
+            if corridor_id == avoid:
+                cost = math.inf
+            elif corridor_id not in wave.corridors and corridor_id not in self.wave_plan:
+                number, floor, parity = layout[corridor_id]
+                bounds = (wave.max_min_odd_corridor if parity else wave.max_min_even_corridor).get(floor)
+                if bounds is not None:
+                    cost += self.span_weight * (max(bounds[0], number) - min(bounds[1], number) - (bounds[0] - bounds[1]))
+                if floor not in wave.floors:
+                    cost += self.config.floor_punishment_weight
+                if corridor_id in self.claimed_corridors or self.delta_cost.corridor_usage.get(corridor_id):
+                    cost += self.config.corridor_punishment_weight
+            key = (cost, available < quantity, -available)
+            if best_key is None or key < best_key:
+                best_key, best_corridor = key, (slot, corridor_id)
+        if best_corridor is None:
+            return None, None, None
+        slot, corridor_id = best_corridor
+        remaining = self.inventory.take(slot, quantity)
+        return corridor_id, corridors[corridor_id], remaining
 
     def calculate_area(self, wave: Wave) -> int:
         area = 0
@@ -141,6 +371,15 @@ class SimulatedAnnealing:
     def calculate_punishment_floor(self, wave: Wave) -> int:
         return len(wave.floors) * self.config.floor_punishment_weight
 
+    def calculate_punishment_class(self, wave: Wave) -> int:
+        if not wave.is_pure():
+            return self.config.class_punishment_weight
+        return 0
+
+    def calculate_punishment_capacity(self, wave: Wave) -> int:
+        excess = wave.total_products - self.config.max_wave_capacity
+        return max(0, excess) * self.config.capacity_punishment_weight
+
     def calculate_punishment_corridor(self, wave: Wave, corridors_used: set) -> int:
         corridors_wave = set(wave.corridors.keys())
         corridors_already_used = corridors_wave.intersection(corridors_used)
@@ -148,84 +387,169 @@ class SimulatedAnnealing:
 
     def validate_solution(self, waves: Dict[int, Wave]) -> bool:
         for wave in waves.values():
-            wave_boxes = self.get_boxes_from_wave(wave)
             if wave.total_products > self.config.max_wave_capacity:
                 print(f"Wave {wave} has more products than allowed")
                 #return False
-            if len(set([box.wave_class for box in wave_boxes])) > 1:
+            if len(wave.class_counts) > 1:
                 print(f"Wave {wave} has boxes with different classes")
                 return False
-            for box in wave_boxes:
+            for box in self.get_boxes_from_wave(wave):
                 if box.wave != wave.id:
                     print(f"Box {box} is not allocated to wave {wave}")
                     return False
         return True
 
+    def check_solution(self) -> None:
+        """Assert that the current waves pass the validator at the current cost."""
+        report = self.validator.validate_annealing(self)
+        assert report.valid, report.errors
+        assert math.isclose(report.cost, self.actual_cost), f"Validated cost {report.cost} differs from {self.actual_cost}"
+
     def get_boxes_from_wave(self, wave: Wave) -> List[Box]:
         boxes_corridors = self.get_boxes_ids_from_wave(wave)
         return [self.boxes[box_id] for box_id in boxes_corridors]
 
     def get_boxes_ids_from_wave(self, wave: Wave):
-        boxes_corridors = set()
-        for corridor in wave.corridors.keys():
-            boxes_corridors.update(wave.corridors[corridor].keys())
-        return boxes_corridors
+        return wave.boxes.keys()
 
     def simulated_annealing(self):
+        self.start()
+        self.anneal(self.config.sa_max)
+        self.finish()
+        if self.config.verbose:
+            print(f"\nBest cost: {self.solution_cost}")
+
+    def start(self) -> None:
+        # the time budget covers the construction and the calibration too
+        if self.config.time_limit is not None:
+            self.deadline = time.perf_counter() + self.config.time_limit
+        if self.config.debug_validate:
+            # built before the construction takes any stock
+            self.validator = SolutionValidator.from_annealing(self)
         self.generate_initial_solution()
-        current_solution = self.waves.copy()
-        current_cost = self.calculate_fo(current_solution)
-        corridors_solution = self.corridors.copy()
-        best_solution = current_solution
-        best_cost = current_cost
-
-        iteration = 0
-        while self.temperature > 1 and iteration < self.config.sa_max:
-            neighbor_solution = self.generate_neighbor(current_solution, corridors_solution)
+        # waves are changed in place; the journal reverts rejected moves and, at the end,
+        # every move accepted after the best solution was found
+        self.delta_cost.attach(self.waves)
+        self.actual_cost = self.calculate_fo_for_solution(self.waves)
+        self.solution_cost = self.actual_cost
+        if self.validator is not None:
+            self.check_solution()
+        self.iteration = 0
+        self.accepted_moves = 0
+        self.last_improvement = 0
+        self.reheats = 0
+        if self.config.sample_moves:
+            self.calibrate(self.config.sample_moves)
+        if self.telemetry is not None:
+            self.telemetry.reset()
+
+    def calibrate(self, samples: int) -> None:
+        """Tune the cooling schedule from the deltas of sampled (and undone) moves.
+
+        With d the median worsening delta (merges and splits make the mean jumpy), the
+        temperatures accepting d with probability initial_acceptance and final_acceptance
+        become max_temp and final_temp, and alpha is chosen to go from one to the other in
+        sa_max iterations.
+        """
+        deltas = []
+        for _ in range(samples):
+            move_start = self.journal.mark()
+            neighbor_cost = self.calculate_fo_for_solution(self.generate_neighbor(self.waves, self.corridors))
+            self.journal.rollback(move_start)
+            if neighbor_cost > self.actual_cost:
+                deltas.append(neighbor_cost - self.actual_cost)
+        if not deltas:
+            return
+        delta = sorted(deltas)[len(deltas) // 2]
+        self.max_temp = self.temperature = -delta / math.log(self.config.initial_acceptance)
+        self.final_temp = -delta / math.log(self.config.final_acceptance)
+        self.alpha = (self.final_temp / self.max_temp) ** (1 / max(1, self.config.sa_max))
+
+    def is_running(self) -> bool:
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return False
+        return self.temperature > self.final_temp and self.iteration < self.config.sa_max
+
+    def cool(self, started: float, iterations: int) -> None:
+        """Lower the temperature after an iteration, reheating after a stagnation (see Config).
+
+        Under a time limit, alpha is re-derived every iteration so that the temperature
+        reaches final_temp at the deadline, at the mean iteration time seen so far.
+        """
+        if self.deadline is not None and iterations:
+            now = time.perf_counter()
+            remaining = (self.deadline - now) * iterations / max(now - started, 1e-9)
+            self.alpha = (self.final_temp / self.temperature) ** (1 / max(1.0, remaining))
+        self.temperature *= self.alpha
+        if self.config.stagnation_limit and self.iteration - self.last_improvement >= self.config.stagnation_limit:
+            # reheat from the best solution, which also bounds the moves finish() has to undo
+            self.journal.rollback()
+            self.actual_cost = self.solution_cost
+            self.temperature = max(self.temperature, self.config.reheat * self.max_temp)
+            self.last_improvement = self.iteration
+            self.reheats += 1
+
+    def anneal(self, iterations: int) -> None:
+        """Run up to `iterations` more steps from the current state (see start/finish)."""
+        started = time.perf_counter()
+        for step in range(iterations):
+            if not self.is_running():
+                break
+            move_start = self.journal.mark()
+            move_started = time.perf_counter()
+            neighbor_solution = self.generate_neighbor(self.waves, self.corridors)
+            generated = time.perf_counter()
             neighbor_cost = self.calculate_fo_for_solution(neighbor_solution)
-            print(f"Current cost: {current_cost}, Neighbor cost: {neighbor_cost}, iteration: {iteration}")
-
-            if self.accept_solution(current_cost, neighbor_cost):
-                current_solution = neighbor_solution
-                current_cost = neighbor_cost
-
-                if current_cost < best_cost:
-                    best_solution = current_solution
-                    best_cost = current_cost
-
-            self.temperature *= self.config.alpha
-            iteration += 1
-
-        self.waves = best_solution
-        self.best_solution = best_solution
-        self.solution_cost = best_cost
-        print(f"\nBest cost: {self.solution_cost}")
+            evaluated = time.perf_counter()
+            if self.config.verbose:
+                print(f"Current cost: {self.actual_cost}, Neighbor cost: {neighbor_cost}, iteration: {self.iteration}")
+
+            if self.accept_solution(self.actual_cost, neighbor_cost):
+                outcome = "improved" if neighbor_cost < self.actual_cost else "accepted"
+                self.actual_cost = neighbor_cost
+                self.accepted_moves += 1
+
+                if self.actual_cost < self.solution_cost:
+                    outcome = "best"
+                    self.solution_cost = self.actual_cost
+                    self.last_improvement = self.iteration
+                    self.journal.commit()
+                    if self.validator is not None:
+                        self.check_solution()
+            else:
+                outcome = "rejected"
+                self.journal.rollback(move_start)
+            self.moves.reward(outcome)
+            if self.telemetry is not None:
+                self.telemetry.record(self, outcome != "rejected", generated - move_started, evaluated - generated)
+
+            self.iteration += 1
+            self.cool(started, step + 1)
+
+    def finish(self) -> None:
+        """Go back to the best solution found."""
+        self.journal.rollback()
+        self.actual_cost = self.solution_cost
+        if self.config.debug_delta_cost:
+            assert math.isclose(self.delta_cost.check(self.waves), self.solution_cost)
+        self.best_solution = self.waves
+
+    def export_solution(self) -> Dict[int, dict]:
+        """Current waves as plain data: class and corridor key -> box -> sku -> quantity picks."""
+        corridor_keys = self.inventory.corridor_keys
+        return {
+            wave_id: {
+                "wave_class": wave.wave_class,
+                "corridors": {corridor_keys[corridor_id]: boxes for corridor_id, boxes in wave.corridors.items()},
+            }
+            for wave_id, wave in self.waves.items()
+        }
 
     def generate_neighbor(self, current_solution, corridors_solution: [Corridor]):
-        def get_number_of_corridors_to_swap(wave: Wave):
-            max_swaps = len(wave.corridors.keys()) // 2
-            temp_ratio = self.temperature / self.max_temp
-            return randint(1, max(1, int(max_swaps * temp_ratio)))
+        """Apply one move of the move library (see Moves) to the waves, in place."""
+        self.moves.apply()
+        return current_solution
 
-        def refill_corridors(corridor: Corridor, boxes: dict[int, dict[str, int]]):
-            for box in boxes:
-                for sku, quantity in boxes[box].items():
-                    corridor.add_product(sku, quantity)
-
-        neighbor_solution = current_solution.copy()
-        for wave_id, wave in neighbor_solution.items():
-            num_corridors_picks = get_number_of_corridors_to_swap(wave)
-            corridors_keys = list(wave.corridors.keys())
-            corridors_keys.sort()
-            sorted_corridors = sample(corridors_keys, num_corridors_picks)
-            boxes_to_reallocate = []
-            for corridor in sorted_corridors:
-                boxes = wave.remove_corridor(corridor)
-                refill_corridors(corridors_solution[corridor], boxes)
-                boxes_to_reallocate.extend(list(boxes.keys()))
-            for box in boxes_to_reallocate:
-                self.allocate_boxes_to_corridors(self.boxes[box], wave_id, corridors_solution, True)
-            # verificar porque nao esta conseguindo achar corredores para realocar
     def calculate_fo(self, waves) -> float:
         total_waves = len(waves)
         if total_waves == 0:
@@ -239,18 +563,8 @@ class SimulatedAnnealing:
         corridors_used = set()
 
         for wave in waves.values():
-            # Class mismatch penalty
-            box_classes = {self.boxes[bid].wave_class for bid in self.get_boxes_ids_from_wave(wave)}
-            if len(box_classes) > 1:
-                class_punishment += 1000  # Adjust weight as needed
-            elif wave.wave_class not in box_classes:
-                class_punishment += 1000
-
-            # Capacity penalty
-            if wave.total_products > self.config.max_wave_capacity:
-                excess = wave.total_products - self.config.max_wave_capacity
-                capacity_punishment += excess * 10  # Adjust weight
-
+            class_punishment += self.calculate_punishment_class(wave)
+            capacity_punishment += self.calculate_punishment_capacity(wave)
             total_area += self.calculate_area(wave)
             floor_punishment += self.calculate_punishment_floor(wave)
             corridor_punishment += self.calculate_punishment_corridor(wave, corridors_used)
@@ -266,10 +580,9 @@ class SimulatedAnnealing:
             return True
         else:
             delta = neighbor_cost - current_cost
-            return random() < math.exp(delta / self.temperature)
+            return random() < math.exp(-delta / self.temperature)
 
     def calculate_fo_for_solution(self, solution):
-        original_waves = self.waves.copy()
-        cost = self.calculate_fo(solution)
-        self.waves = original_waves
-        return cost
\ No newline at end of file
+        if self.config.debug_delta_cost:
+            return self.delta_cost.check(solution)
+        return self.delta_cost.cost()
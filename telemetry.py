@@ -0,0 +1,83 @@
+import csv
+import json
+import time
+from typing import Dict, Iterator
+
+import numpy as np
+
+
+class Telemetry:
+    """Progress of an annealing run kept in a fixed-size ring buffer.
+
+    SimulatedAnnealing calls record once per iteration; every `every` iterations a row is
+    written into preallocated NumPy columns, so recording costs no I/O and no allocation,
+    and only the last `capacity` rows are kept. Rows are exported, oldest first, with
+    to_csv or to_jsonl once the run is over.
+    """
+
+    COLUMNS = {
+        "iteration": np.int64,
+        "seconds": np.float64,
+        "temperature": np.float64,
+        "current_cost": np.float64,
+        "best_cost": np.float64,
+        "accepted": np.bool_,
+        "acceptance_rate": np.float64,
+        "move": np.int64,
+        "neighbor_seconds": np.float64,
+        "evaluation_seconds": np.float64,
+    }
+
+    def __init__(self, capacity: int = 100_000, every: int = 1):
+        self.capacity = capacity
+        self.every = every
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        self.moves: Dict[str, int] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.calls = 0
+        self.started = time.perf_counter()
+
+    def record(self, annealing, accepted: bool, neighbor_seconds: float, evaluation_seconds: float) -> None:
+        self.calls += 1
+        if (self.calls - 1) % self.every:
+            return
+        row = self.count % self.capacity
+        self.count += 1
+        move = annealing.moves.last
+        columns = self.columns
+        columns["iteration"][row] = annealing.iteration
+        columns["seconds"][row] = time.perf_counter() - self.started
+        columns["temperature"][row] = annealing.temperature
+        columns["current_cost"][row] = annealing.actual_cost
+        columns["best_cost"][row] = annealing.solution_cost
+        columns["accepted"][row] = accepted
+        columns["acceptance_rate"][row] = annealing.accepted_moves / (annealing.iteration + 1)
+        columns["move"][row] = -1 if move is None else self.moves.setdefault(move, len(self.moves))
+        columns["neighbor_seconds"][row] = neighbor_seconds
+        columns["evaluation_seconds"][row] = evaluation_seconds
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def rows(self) -> Iterator[dict]:
+        """Recorded rows as plain dicts, oldest first."""
+        move_names = {index: name for name, index in self.moves.items()}
+        first = self.count - len(self)
+        for position in range(first, self.count):
+            row = {name: column[position % self.capacity].item() for name, column in self.columns.items()}
+            row["move"] = move_names.get(row["move"])
+            yield row
+
+    def to_csv(self, path) -> None:
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(self.COLUMNS))
+            writer.writeheader()
+            writer.writerows(self.rows())
+
+    def to_jsonl(self, path) -> None:
+        with open(path, "w") as file:
+            for row in self.rows():
+                file.write(json.dumps(row) + "\n")
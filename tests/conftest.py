@@ -0,0 +1,38 @@
+import contextlib
+import io
+import os
+import random
+import sys
+
+import pytest
+
+# the modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_instances import GenerateInstances
+from instance_cache import load_instance
+from simulated_annealing import Config, SimulatedAnnealing
+
+
+@pytest.fixture(scope="session")
+def instance(tmp_path_factory):
+    """A small generated instance: 40 boxes of 3 classes over 165 corridors."""
+    directory = tmp_path_factory.mktemp("instance")
+    with contextlib.redirect_stdout(io.StringIO()):
+        instances = GenerateInstances(40, 100, 3, 165, 5, seed=7)
+    instances.stock_to_csv(directory / "stock.csv")
+    instances.box_to_csv(directory / "boxes.csv")
+    return load_instance(directory / "stock.csv", directory / "boxes.csv", use_cache=False)
+
+
+@pytest.fixture
+def annealing(instance):
+    """A started annealing with several waves per class, built with a validator."""
+    random.seed(0)
+    sa = SimulatedAnnealing(
+        instance.stock_layout, instance.product_boxes, Config(max_wave_capacity=1500, debug_validate=True)
+    )
+    sa.fill_boxes()
+    sa.fill_corridors(instance.inventory())
+    sa.start()
+    return sa
@@ -0,0 +1,20 @@
+from collections import Counter
+
+
+def test_clusters_partition_each_class_within_capacity(annealing):
+    for wave_class in set(box.wave_class for box in annealing.boxes.values()):
+        boxes = [box for box in annealing.boxes.values() if box.wave_class == wave_class]
+        waves = annealing.cluster_boxes(boxes)
+        assert Counter(box.id for wave in waves for box in wave) == Counter(box.id for box in boxes)
+        assert all(
+            sum(box.get_total_products() for box in wave) <= annealing.config.max_wave_capacity
+            or len(wave) == 1
+            for wave in waves
+        )
+
+
+def test_few_candidates_still_cover_every_box(annealing):
+    annealing.config.cluster_candidates = 1
+    boxes = list(annealing.boxes.values())
+    waves = annealing.cluster_boxes(boxes)
+    assert sorted(box.id for wave in waves for box in wave) == sorted(box.id for box in boxes)
@@ -0,0 +1,24 @@
+import math
+import random
+
+
+def test_starts_at_the_full_cost(annealing):
+    assert math.isclose(annealing.delta_cost.cost(), annealing.calculate_fo(annealing.waves))
+
+
+def test_follows_random_moves_and_rollbacks(annealing):
+    for _ in range(200):
+        mark = annealing.journal.mark()
+        annealing.moves.apply()
+        assert math.isclose(annealing.delta_cost.cost(), annealing.calculate_fo(annealing.waves))
+        if random.random() < 0.5:
+            annealing.journal.rollback(mark)
+            assert math.isclose(annealing.delta_cost.cost(), annealing.calculate_fo(annealing.waves))
+
+
+def test_follows_an_annealing_run(annealing):
+    annealing.anneal(100)
+    assert math.isclose(annealing.delta_cost.cost(), annealing.calculate_fo(annealing.waves))
+    annealing.finish()
+    assert math.isclose(annealing.delta_cost.cost(), annealing.solution_cost)
+    assert math.isclose(annealing.calculate_fo(annealing.waves), annealing.solution_cost)
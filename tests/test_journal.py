@@ -0,0 +1,62 @@
+import copy
+
+import numpy as np
+
+
+def snapshot(annealing):
+    waves = {
+        wave_id: (
+            wave,
+            wave.wave_class,
+            copy.deepcopy(wave.corridors),
+            dict(wave.boxes),
+            dict(wave.class_counts),
+            set(wave.floors),
+            copy.deepcopy(wave.max_min_even_corridor),
+            copy.deepcopy(wave.max_min_odd_corridor),
+            copy.deepcopy(wave.sorted_corridors),
+            wave.total_products,
+        )
+        for wave_id, wave in annealing.waves.items()
+    }
+    boxes = {box_id: (box.wave, copy.deepcopy(box.corridors)) for box_id, box in annealing.boxes.items()}
+    inventory = (annealing.inventory.stock.copy(), annealing.inventory.sku_remaining.copy())
+    return waves, boxes, inventory, annealing.delta_cost.cost()
+
+
+def assert_same(before, after):
+    waves, boxes, inventory, cost = before
+    assert after[0] == waves
+    assert after[1] == boxes
+    np.testing.assert_array_equal(after[2][0], inventory[0])
+    np.testing.assert_array_equal(after[2][1], inventory[1])
+    assert after[3] == cost
+
+
+def test_rollback_to_a_mark_undoes_every_move(annealing):
+    before = snapshot(annealing)
+    mark = annealing.journal.mark()
+    for _ in range(50):
+        annealing.moves.apply()
+    annealing.journal.rollback(mark)
+    assert_same(before, snapshot(annealing))
+
+
+def test_rollback_undoes_each_move_alone(annealing):
+    for _ in range(50):
+        before = snapshot(annealing)
+        mark = annealing.journal.mark()
+        annealing.moves.apply()
+        annealing.journal.rollback(mark)
+        assert_same(before, snapshot(annealing))
+        # keep the next move starting from a different solution
+        annealing.moves.apply()
+        annealing.journal.commit()
+
+
+def test_finish_returns_to_the_last_commit(annealing):
+    before = snapshot(annealing)
+    for _ in range(30):
+        annealing.moves.apply()
+    annealing.finish()
+    assert_same(before, snapshot(annealing))
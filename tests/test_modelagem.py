@@ -0,0 +1,62 @@
+import os
+import sys
+import types
+
+import pytest
+
+# the exact model lives in modelo-exato; appended so its modules do not shadow the root ones
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "modelo-exato"))
+
+from modelagem import Modelo, limite_gurobi
+
+
+def infeasible(inteira):
+    modelo = Modelo("inviavel")
+    x = modelo.adiciona_variaveis("x", [0, 1], ub=1, inteira=inteira, custo=1)
+    modelo.adiciona_restricoes("soma", [0, 0], x, 1, lb=3)
+    return modelo
+
+
+@pytest.mark.parametrize("inteira", [True, False])
+def test_highs_without_a_solution(inteira):
+    pytest.importorskip("highspy")
+    solucao = infeasible(inteira).resolve("highs", {"output_flag": False})
+    assert solucao.objetivo is None and solucao.valores is None
+    assert solucao.limite is None
+    assert not solucao.otima
+
+
+class GurobiError(Exception):
+    pass
+
+
+class FakeModel:
+    def __init__(self, status, bound=None, is_mip=True):
+        self.Status = status
+        self.IsMIP = is_mip
+        self.bound = bound
+
+    @property
+    def ObjBound(self):
+        if self.bound is None:
+            raise GurobiError("Unable to retrieve attribute 'ObjBound'")
+        return self.bound
+
+
+@pytest.fixture
+def grb(monkeypatch):
+    """A stand-in gurobipy with the status codes and error limite_gurobi uses."""
+    GRB = types.SimpleNamespace(OPTIMAL=2, INFEASIBLE=3, INTERRUPTED=11, TIME_LIMIT=9, SUBOPTIMAL=13)
+    monkeypatch.setitem(sys.modules, "gurobipy", types.SimpleNamespace(GRB=GRB, GurobiError=GurobiError))
+    return GRB
+
+
+def test_gurobi_bound_without_a_solution(grb):
+    assert limite_gurobi(FakeModel(grb.INFEASIBLE)) is None
+    assert limite_gurobi(FakeModel(grb.TIME_LIMIT)) is None
+    assert limite_gurobi(FakeModel(grb.INTERRUPTED), objetivo=None) is None
+
+
+def test_gurobi_bound_with_a_solution(grb):
+    assert limite_gurobi(FakeModel(grb.TIME_LIMIT, bound=7.0)) == 7.0
+    assert limite_gurobi(FakeModel(grb.OPTIMAL, is_mip=False), objetivo=3.0) == 3.0
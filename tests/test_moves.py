@@ -0,0 +1,53 @@
+import math
+
+import pytest
+
+from moves import Moves
+from simulated_annealing import Config
+
+
+def check_valid(annealing):
+    report = annealing.validator.validate_annealing(annealing)
+    assert report.valid, report.errors
+    assert math.isclose(report.cost, annealing.delta_cost.cost())
+
+
+def test_initial_solution_is_valid(annealing):
+    check_valid(annealing)
+
+
+def only(annealing, name):
+    annealing.moves.weights = {name: 1.0}
+
+
+@pytest.mark.parametrize("name", Config.moves)
+def test_operator_keeps_the_solution_valid(annealing, name):
+    # the construction fills waves up; splits leave room for merges and relocations
+    only(annealing, "split")
+    for _ in range(10):
+        annealing.moves.apply()
+    annealing.journal.commit()
+    only(annealing, name)
+    applied = 0
+    for _ in range(40):
+        mark = annealing.journal.mark()
+        applied += annealing.moves.apply() is not None
+        check_valid(annealing)
+        if applied % 2:
+            # rejected moves must leave a valid solution too
+            annealing.journal.rollback(mark)
+            check_valid(annealing)
+    assert applied, f"{name} was never feasible"
+
+
+def test_weights_follow_rewards(annealing):
+    moves = annealing.moves
+    for _ in range(annealing.config.move_segment):
+        moves.last = "merge"
+        moves.reward("best")
+    assert moves.weights["merge"] > 1.0
+    assert all(weight == 1.0 for name, weight in moves.weights.items() if name != "merge")
+    for _ in range(20 * annealing.config.move_segment):
+        moves.last = "merge"
+        moves.reward("rejected")
+    assert moves.weights["merge"] == pytest.approx(Moves.MIN_WEIGHT)
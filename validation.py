@@ -0,0 +1,257 @@
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from inventory import Inventory
+
+
+@dataclass
+class ValidationReport:
+    cost: float
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+
+def lookup(table: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Position of each value in the sorted table, -1 where it is missing."""
+    index = np.searchsorted(table, values)
+    found = index < len(table)
+    found[found] = table[index[found]] == values[found]
+    return np.where(found, index, -1)
+
+
+def group_sum(keys: np.ndarray, values: np.ndarray):
+    """Unique keys and the sum of values over each key."""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return unique, np.bincount(inverse, weights=values, minlength=len(unique)).astype(np.int64)
+
+
+def examples(values) -> str:
+    values = np.asarray(values).tolist()
+    return ", ".join(map(str, values[:5])) + (", ..." if len(values) > 5 else "")
+
+
+class SolutionValidator:
+    """Checks a complete wave solution, independently of the annealing state.
+
+    The instance (box demand and classes, the initial corridor stock and the corridor
+    layout) is indexed once. A solution is the wave of every box plus flat pick rows
+    (wave, box, sku, corridor, quantity), and validate checks it with NumPy group-bys:
+    every box demand exactly covered by picks in the box wave, no (sku, corridor) stock
+    over-consumed, wave capacities and classes respected. The objective of
+    SimulatedAnnealing.calculate_fo is recomputed from the picks alone, so it can be
+    compared with the incremental cost.
+    """
+
+    def __init__(
+            self,
+            inventory: Inventory,
+            box_ids: Sequence[int],
+            box_classes: Sequence[str],
+            demand_boxes: Sequence[int],
+            demand_skus: Sequence[int],
+            demand_quantities: Sequence[int],
+            config,
+    ):
+        """inventory must still hold the initial stock; SKUs are ids of inventory.skus (-1 for
+        a SKU absent from it) and demand rows may repeat a (box, sku) pair."""
+        self.config = config
+        self.sku_ids: Dict[str, int] = dict(inventory.sku_ids)
+        self.corridor_keys = np.array(inventory.corridor_keys, dtype=object)
+        self.corridor_ids: Dict[str, int] = dict(inventory.corridor_ids)
+        self.n_skus = len(inventory.skus)
+        self.n_corridors = len(inventory.corridor_keys)
+        self.corridor_numbers = inventory.corridor_numbers.copy()
+        self.corridor_parities = self.corridor_numbers % 2
+        _, self.corridor_floors = np.unique(inventory.corridor_floors, return_inverse=True)
+
+        stock_keys = inventory.slot_skus * self.n_corridors + inventory.slot_corridors
+        order = np.argsort(stock_keys)
+        self.stock_keys = stock_keys[order]
+        self.stock = inventory.stock[order].copy()
+
+        box_ids = np.asarray(box_ids, dtype=np.int64)
+        order = np.argsort(box_ids)
+        self.box_ids = box_ids[order]
+        self.classes, class_codes = np.unique(np.asarray(box_classes, dtype=str), return_inverse=True)
+        self.box_classes = class_codes[order]
+        self.demand_keys, self.demand = group_sum(
+            self.demand_key(np.searchsorted(self.box_ids, demand_boxes), np.asarray(demand_skus, dtype=np.int64)),
+            np.asarray(demand_quantities, dtype=np.int64),
+        )
+
+    @classmethod
+    def from_instance(cls, instance, config) -> "SolutionValidator":
+        arrays = instance.arrays
+        box_ids, first_rows = np.unique(arrays["box_id"], return_index=True)
+        return cls(
+            instance.inventory(),
+            box_ids,
+            instance.wave_classes[arrays["box_wave_class"][first_rows]],
+            arrays["box_id"],
+            arrays["box_sku"],
+            arrays["box_pieces"],
+            config,
+        )
+
+    @classmethod
+    def from_annealing(cls, annealing) -> "SolutionValidator":
+        """Validator for the boxes of an annealing, taken before its stock is touched."""
+        inventory = annealing.inventory
+        boxes = list(annealing.boxes.values())
+        rows = sum(len(box.products) for box in boxes)
+        return cls(
+            inventory,
+            [box.id for box in boxes],
+            [box.wave_class for box in boxes],
+            np.fromiter((box.id for box in boxes for _ in box.products), dtype=np.int64, count=rows),
+            np.fromiter(
+                (inventory.sku_ids.get(sku, -1) for box in boxes for sku in box.products), dtype=np.int64, count=rows
+            ),
+            np.fromiter((quantity for box in boxes for quantity in box.products.values()), dtype=np.int64, count=rows),
+            annealing.config,
+        )
+
+    def demand_key(self, box_index: np.ndarray, skus: np.ndarray) -> np.ndarray:
+        return box_index * (self.n_skus + 1) + skus + 1
+
+    def validate_annealing(self, annealing) -> ValidationReport:
+        """Validate the current waves of an annealing."""
+        picks = [
+            (wave.id, box_id, self.sku_ids.get(sku, -1), corridor_id, quantity)
+            for wave in annealing.waves.values()
+            for corridor_id, boxes in wave.corridors.items()
+            for box_id, products in boxes.items()
+            for sku, quantity in products.items()
+        ]
+        box_waves = [annealing.boxes[box_id].wave for box_id in self.box_ids.tolist()]
+        return self.validate(
+            {wave_id: wave.wave_class for wave_id, wave in annealing.waves.items()},
+            [-1 if wave is None else wave for wave in box_waves],
+            *self.pick_columns(picks),
+        )
+
+    def validate_export(self, solution: Dict[int, dict]) -> ValidationReport:
+        """Validate a solution in the SimulatedAnnealing.export_solution format; the wave of
+        a box is the wave of its picks."""
+        picks = [
+            (wave_id, box_id, self.sku_ids.get(sku, -1), self.corridor_ids.get(corridor_key, -1), quantity)
+            for wave_id, wave in solution.items()
+            for corridor_key, boxes in wave["corridors"].items()
+            for box_id, products in boxes.items()
+            for sku, quantity in products.items()
+        ]
+        columns = self.pick_columns(picks)
+        box_waves = np.full(len(self.box_ids), -1, dtype=np.int64)
+        box_index = lookup(self.box_ids, columns[1])
+        box_waves[box_index[box_index >= 0]] = columns[0][box_index >= 0]
+        return self.validate({wave_id: wave["wave_class"] for wave_id, wave in solution.items()}, box_waves, *columns)
+
+    @staticmethod
+    def pick_columns(picks: List[tuple]) -> List[np.ndarray]:
+        if not picks:
+            return [np.empty(0, dtype=np.int64) for _ in range(5)]
+        return [np.array(column, dtype=np.int64) for column in zip(*picks)]
+
+    def validate(
+            self,
+            wave_classes: Dict[int, str],
+            box_waves: Sequence[int],
+            pick_waves: Sequence[int],
+            pick_boxes: Sequence[int],
+            pick_skus: Sequence[int],
+            pick_corridors: Sequence[int],
+            pick_quantities: Sequence[int],
+    ) -> ValidationReport:
+        """Check a solution and recompute its cost.
+
+        wave_classes maps every wave id to its class; box_waves is the wave of each box of
+        box_ids (-1 for none); pick rows carry box ids, SKU ids and corridor ids.
+        """
+        config = self.config
+        errors = []
+        wave_ids = np.array(sorted(wave_classes), dtype=np.int64)
+        n_waves = len(wave_ids)
+        wave_class_codes = lookup(self.classes, np.array([wave_classes[wave_id] for wave_id in wave_ids.tolist()], dtype=str))
+        box_waves = lookup(wave_ids, np.asarray(box_waves, dtype=np.int64))
+        pick_waves = lookup(wave_ids, np.asarray(pick_waves, dtype=np.int64))
+        pick_boxes = np.asarray(pick_boxes, dtype=np.int64)
+        box_index = lookup(self.box_ids, pick_boxes)
+        skus = np.asarray(pick_skus, dtype=np.int64)
+        corridors = np.asarray(pick_corridors, dtype=np.int64)
+        quantities = np.asarray(pick_quantities, dtype=np.int64)
+
+        if (box_waves < 0).any():
+            errors.append(f"{np.count_nonzero(box_waves < 0)} boxes without a wave: {examples(self.box_ids[box_waves < 0])}")
+        malformed = (
+            (pick_waves < 0) | (box_index < 0) | (skus < 0) | (skus >= self.n_skus)
+            | (corridors < 0) | (corridors >= self.n_corridors) | (quantities <= 0)
+        )
+        if malformed.any():
+            errors.append(f"{np.count_nonzero(malformed)} picks with an unknown wave, box, SKU or corridor or no quantity")
+        valid = ~malformed
+        pick_waves, box_index, skus, corridors, quantities = (
+            pick_waves[valid], box_index[valid], skus[valid], corridors[valid], quantities[valid]
+        )
+
+        misplaced = pick_waves != box_waves[box_index]
+        if misplaced.any():
+            errors.append(f"{np.count_nonzero(misplaced)} picks outside the wave of their box: boxes {examples(np.unique(self.box_ids[box_index[misplaced]]))}")
+
+        # demand minus picks per (box, sku) must be zero everywhere
+        keys, balance = group_sum(
+            np.concatenate([self.demand_keys, self.demand_key(box_index, skus)]),
+            np.concatenate([self.demand, -quantities]),
+        )
+        uncovered = keys[balance != 0] // (self.n_skus + 1)
+        if len(uncovered):
+            errors.append(f"{len(uncovered)} (box, sku) demands not exactly covered: boxes {examples(np.unique(self.box_ids[uncovered]))}")
+
+        stock_keys, taken = group_sum(skus * self.n_corridors + corridors, quantities)
+        slots = lookup(self.stock_keys, stock_keys)
+        available = np.where(slots >= 0, self.stock[np.maximum(slots, 0)], 0)
+        over = taken > available
+        if over.any():
+            errors.append(f"{np.count_nonzero(over)} (sku, corridor) stocks over-consumed: corridors {examples(self.corridor_keys[np.unique(stock_keys[over] % self.n_corridors)])}")
+
+        if not n_waves:
+            return ValidationReport(math.inf, errors)
+        wave_products = np.bincount(pick_waves, weights=quantities, minlength=n_waves).astype(np.int64)
+        excess = np.maximum(0, wave_products - config.max_wave_capacity)
+        if excess.any():
+            errors.append(f"{np.count_nonzero(excess)} waves over capacity: {examples(wave_ids[excess > 0])}")
+        assigned = box_waves >= 0
+        mixed = self.box_classes[assigned] != wave_class_codes[box_waves[assigned]]
+        if mixed.any():
+            errors.append(f"{np.count_nonzero(mixed)} boxes in a wave of another class: {examples(self.box_ids[assigned][mixed])}")
+
+        # objective, with wave membership read off the picks as in SimulatedAnnealing
+        foreign = self.box_classes[box_index] != wave_class_codes[pick_waves]
+        impure = (np.bincount(pick_waves, weights=foreign, minlength=n_waves) > 0) | (np.bincount(pick_waves, minlength=n_waves) == 0)
+        wave_corridors = np.unique(pick_waves * self.n_corridors + corridors)
+        used_waves, used_corridors = wave_corridors // self.n_corridors, wave_corridors % self.n_corridors
+        floors = self.corridor_floors[used_corridors]
+        n_floors = int(self.corridor_floors.max()) + 1
+        spans, span_index = np.unique(
+            (used_waves * n_floors + floors) * 2 + self.corridor_parities[used_corridors], return_inverse=True
+        )
+        numbers = self.corridor_numbers[used_corridors]
+        highest = np.full(len(spans), np.iinfo(np.int64).min)
+        lowest = np.full(len(spans), np.iinfo(np.int64).max)
+        np.maximum.at(highest, span_index, numbers)
+        np.minimum.at(lowest, span_index, numbers)
+        wave_floors = len(np.unique(used_waves * n_floors + floors))
+        overlaps = np.maximum(0, np.bincount(used_corridors, minlength=self.n_corridors) - 1).sum()
+        cost = (
+            (highest - lowest).sum() / n_waves
+            + wave_floors * config.floor_punishment_weight
+            + overlaps * config.corridor_punishment_weight
+            + np.count_nonzero(impure) * config.class_punishment_weight
+            + excess.sum() * config.capacity_punishment_weight
+        )
+        return ValidationReport(float(cost), errors)
@@ -1,91 +1,114 @@
-from box import Box
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Mapping, Sequence
+
 
 class Wave:
-    def __init__(self, wave_class: str, id: int):
+    def __init__(
+            self,
+            wave_class: str,
+            id: int,
+            corridor_layout: Sequence[tuple[int, int, int]],
+            box_classes: Mapping[int, str],
+    ):
         self.id = id
         self.wave_class = wave_class
-        self.corridors: dict[str, dict[int, dict[str, int]]] = {}
+        # corridors are the dense ids of the Inventory; corridor_layout[corridor_id] is the
+        # (corridor number, floor, parity) of each one (see Inventory.corridor_layout)
+        self.corridor_layout = corridor_layout
+        self.corridors: dict[int, dict[int, dict[str, int]]] = {}
         self.floors: set[int] = set()
         self.max_min_even_corridor: dict[int, list[int]] = {}
         self.max_min_odd_corridor: dict[int, list[int]] = {}
+        # sorted corridor numbers of the wave per (floor, parity); the spans above and the floor
+        # set are read off their ends whenever a corridor enters or leaves the wave
+        self.sorted_corridors: dict[tuple[int, int], list[int]] = {}
+        # box_id -> number of corridors holding picks of the box, and boxes per class; a box
+        # is in the wave while it has picks in some corridor
+        self.box_classes = box_classes
+        self.boxes: dict[int, int] = {}
+        self.class_counts: Counter[str] = Counter()
         self.total_products: int = 0
+        self.cost_tracker = None
 
-    def add_corridor(self, corridor_key: str, box_id: int, product: str, quantity: int) -> None:
-        if corridor_key not in self.corridors:
-            self.corridors[corridor_key] = {}
-        if box_id not in self.corridors[corridor_key]:
-            self.corridors[corridor_key][box_id] = {}
-        if product not in self.corridors[corridor_key][box_id]:
-            self.corridors[corridor_key][box_id][product] = 0
-        self.corridors[corridor_key][box_id][product] += quantity
-        corridor_id, floor = self.extract_corridor_id_floor(corridor_key)
-        self.add_floor(floor)
-        self.update_corridor_bounds(corridor_id, floor)
+    def add_corridor(self, corridor_id: int, box_id: int, product: str, quantity: int) -> None:
+        if corridor_id not in self.corridors:
+            self.corridors[corridor_id] = {}
+            self.insert_corridor(corridor_id)
+            if self.cost_tracker is not None:
+                self.cost_tracker.corridor_added(self, corridor_id)
+        if box_id not in self.corridors[corridor_id]:
+            self.corridors[corridor_id][box_id] = {}
+            self.insert_box_entry(box_id)
+        if product not in self.corridors[corridor_id][box_id]:
+            self.corridors[corridor_id][box_id][product] = 0
+        self.corridors[corridor_id][box_id][product] += quantity
         self.total_products += quantity
+        if self.cost_tracker is not None:
+            self.cost_tracker.wave_changed(self)
 
-    def get_boxes_corridor(self, corridor_key: str) -> set[int]:
-        if corridor_key in self.corridors:
-            return set(self.corridors[corridor_key].keys())
-        return set()
-
-    def add_floor(self, floor: int) -> None:
-        self.floors.add(floor)
-
-    def extract_corridor_id_floor(self, corridor_key: str) -> tuple[int, int]:
-        try:
-            corridor_id, floor = corridor_key.split("_")
-            return int(corridor_id), int(floor)
-        except ValueError:
-            raise ValueError(f"Invalid corridor_key format: {corridor_key}")
-
-    def update_corridor_bounds(self, corridor_id: int, floor: int) -> None:
-        is_even = corridor_id % 2 == 0
-        bounds_dict = self.max_min_even_corridor if is_even else self.max_min_odd_corridor
-
-        if floor not in bounds_dict:
-            bounds_dict[floor] = [corridor_id, corridor_id]
+    def insert_box_entry(self, box_id: int) -> None:
+        """Account for a box getting picks in one more corridor of the wave."""
+        if box_id in self.boxes:
+            self.boxes[box_id] += 1
         else:
-            bounds_dict[floor][0] = max(bounds_dict[floor][0], corridor_id)  # Update max
-            bounds_dict[floor][1] = min(bounds_dict[floor][1], corridor_id)  # Update min
-
-    def update_max_min_corridor(self):
-        corridors = set()
-        for corridor_key in self.corridors:
-            corridor_id, floor = self.extract_corridor_id_floor(corridor_key)
-            corridors.add(corridor_id)
-        even_corridors = [corridor for corridor in corridors if corridor % 2 == 0]
-        odd_corridors = [corridor for corridor in corridors if corridor % 2 != 0]
-        even_corridors.sort()
-        odd_corridors.sort()
-        self.max_min_even_corridor = {floor: [even_corridors[-1], even_corridors[0]] for floor in self.floors}
-        self.max_min_odd_corridor = {floor: [odd_corridors[-1], odd_corridors[0]] for floor in self.floors}
+            self.boxes[box_id] = 1
+            self.class_counts[self.box_classes[box_id]] += 1
 
+    def discard_box_entry(self, box_id: int) -> None:
+        """Account for a box losing its picks in one corridor (the inverse of insert_box_entry)."""
+        self.boxes[box_id] -= 1
+        if not self.boxes[box_id]:
+            del self.boxes[box_id]
+            box_class = self.box_classes[box_id]
+            self.class_counts[box_class] -= 1
+            if not self.class_counts[box_class]:
+                del self.class_counts[box_class]
 
-    def update_floors(self):
-        floors_used = set()
-        for corridor_key in self.corridors:
-            corridor_id, floor = self.extract_corridor_id_floor(corridor_key)
-            floors_used.add(floor)
-        self.floors = floors_used
+    def is_pure(self) -> bool:
+        """Whether the wave has boxes and all of them are of the wave class."""
+        return len(self.class_counts) == 1 and self.wave_class in self.class_counts
 
-    def remove_box_corridor(self, box: Box) -> None:
-        for corridor_key in box.get_corridors():
-            if corridor_key in self.corridors and box.id in self.corridors[corridor_key]:
-                self.corridors[corridor_key].pop(box.id)
-                if not self.corridors[corridor_key]:
-                    del self.corridors[corridor_key]
-                    self.update_floors()
-                    self.update_max_min_corridor()
+    def insert_corridor(self, corridor_id: int) -> None:
+        """Account for a corridor entering the wave: O(log n) search plus a short list shift."""
+        number, floor, parity = self.corridor_layout[corridor_id]
+        numbers = self.sorted_corridors.setdefault((floor, parity), [])
+        insort(numbers, number)
+        self.set_bounds(floor, parity, numbers)
+        self.floors.add(floor)
 
-    def remove_box(self, box: Box) -> None:
-        self.total_products -= box.get_total_products()
-        self.remove_box_corridor(box)
+    def discard_corridor(self, corridor_id: int) -> None:
+        """Account for a corridor leaving the wave (the inverse of insert_corridor)."""
+        number, floor, parity = self.corridor_layout[corridor_id]
+        numbers = self.sorted_corridors[floor, parity]
+        del numbers[bisect_left(numbers, number)]
+        if not numbers:
+            del self.sorted_corridors[floor, parity]
+            if (floor, 1 - parity) not in self.sorted_corridors:
+                self.floors.discard(floor)
+        self.set_bounds(floor, parity, numbers)
 
+    def set_bounds(self, floor: int, parity: int, numbers: list[int]) -> None:
+        bounds_dict = self.max_min_odd_corridor if parity else self.max_min_even_corridor
+        if numbers:
+            bounds_dict[floor] = [numbers[-1], numbers[0]]
+        else:
+            bounds_dict.pop(floor, None)
 
-    def remove_corridor(self, corridor_key: str) -> dict[int, dict[str, int]]:
-        if corridor_key in self.corridors:
-            box = self.corridors[corridor_key]
-            del self.corridors[corridor_key]
-            self.update_floors()
-            self.update_max_min_corridor()
-            return box
\ No newline at end of file
+    def remove_pick(self, corridor_id: int, box_id: int, product: str, quantity: int) -> None:
+        """Undo an add_corridor call."""
+        box_products = self.corridors[corridor_id][box_id]
+        box_products[product] -= quantity
+        if box_products[product] <= 0:
+            del box_products[product]
+            if not box_products:
+                del self.corridors[corridor_id][box_id]
+                self.discard_box_entry(box_id)
+        self.total_products -= quantity
+        if not self.corridors[corridor_id]:
+            del self.corridors[corridor_id]
+            self.discard_corridor(corridor_id)
+            if self.cost_tracker is not None:
+                self.cost_tracker.corridor_removed(self, corridor_id)
+        if self.cost_tracker is not None:
+            self.cost_tracker.wave_changed(self)